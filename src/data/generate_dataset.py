@@ -5,311 +5,443 @@ Generates synthetic UPI transaction data with realistic fraud patterns
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
-import random
+from concurrent.futures import ProcessPoolExecutor
 import os
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Output column order
+COLUMNS = [
+    'transaction_id', 'amount', 'time_slot', 'is_new_device', 'is_new_beneficiary',
+    'location_change', 'transaction_frequency', 'past_fraud_flag', 'amount_deviation',
+    'beneficiary_trust_score', 'device_age_days', 'account_age_days',
+    'is_small_verification', 'is_first_time_user', 'beneficiary_change_velocity',
+    'is_rural_user', 'rapid_transactions_1h', 'upi_pin_failed_attempts', 'account_reports',
+    'location', 'device_id', 'payee_balance_before', 'payee_balance_after',
+    'beneficiary_balance_before', 'beneficiary_balance_after', 'fraud_type', 'is_fraud',
+]
 
-def generate_upi_transactions(n_samples=10000, fraud_ratio=0.15):
-    """
-    Generate synthetic UPI transaction dataset
+# Compact storage for 0/1 flags and small bounded counters
+COLUMN_DTYPES = {
+    'time_slot': np.int8,
+    'fraud_type': np.int8,
+    'is_new_device': np.int8,
+    'is_new_beneficiary': np.int8,
+    'location_change': np.int8,
+    'past_fraud_flag': np.int8,
+    'is_fraud': np.int8,
+    'transaction_frequency': np.int16,
+    'beneficiary_change_velocity': np.int16,
+    'rapid_transactions_1h': np.int16,
+    'upi_pin_failed_attempts': np.int16,
+    'account_reports': np.int16,
+    'device_age_days': np.int16,
+    'account_age_days': np.int16,
+}
+
+# Indian cities for realistic locations
+METRO_CITIES = np.array(['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune'])
+TIER2_CITIES = np.array(['Lucknow', 'Jaipur', 'Ahmedabad', 'Surat', 'Nagpur', 'Indore', 'Chandigarh', 'Coimbatore'])
+RURAL_AREAS = np.array(['Meerut', 'Bhopal', 'Amritsar', 'Mysore', 'Ranchi', 'Raipur', 'Guwahati', 'Dehradun'])
+ALL_LOCATIONS = np.concatenate([METRO_CITIES, TIER2_CITIES, RURAL_AREAS])
+
+# Legitimate traffic distributions
+LOCATION_TYPE_P = np.array([0.5, 0.3, 0.2])  # Metro, Tier-2, Rural
+TIME_SLOT_P = np.array([0.2, 0.4, 0.3, 0.1])  # Morning, Afternoon, Evening, Night
+AMOUNT_BUCKET_P = np.array([0.6, 0.3, 0.1])  # Small, medium, large amounts
+AMOUNT_BUCKET_LOWS = np.array([10.0, 500.0, 2000.0])
+AMOUNT_BUCKET_HIGHS = np.array([500.0, 2000.0, 10000.0])
+
+
+def _cumulative(p):
+    """Cumulative probabilities with the last edge pinned to exactly 1.0"""
+    cum = np.cumsum(p)
+    cum[-1] = 1.0
+    return cum
+
+
+LOCATION_TYPE_CUM = _cumulative(LOCATION_TYPE_P)
+TIME_SLOT_CUM = _cumulative(TIME_SLOT_P)
+AMOUNT_BUCKET_CUM = _cumulative(AMOUNT_BUCKET_P)
+
+FRAUD_TYPES = ['legitimate', 'high_amount', 'new_device', 'night_rush', 'multiple_new']
+FRAUD_TYPE_CODES = {name: code for code, name in enumerate(FRAUD_TYPES)}
+
+# Decimal places kept for raw float columns (balances are rounded when computed)
+COLUMN_DECIMALS = {
+    'amount': 2,
+    'amount_deviation': 3,
+    'beneficiary_trust_score': 3,
+}
+
+
+def _transaction_ids(count, start=1):
+    """Build sequential 'TXN00000001'-style ids with vectorized string ops"""
+    return np.char.add('TXN', np.char.zfill(np.arange(start, start + count).astype(str), 8))
+
+
+def _weighted_choice(cum_p, size, rng):
+    """Draw category indices from cumulative probabilities with one uniform draw + searchsorted"""
+    return np.searchsorted(cum_p, rng.random(size), side='right')
+
+
+def _device_ids(count, rng):
+    """Draw random 'DEV12345'-style device ids with vectorized string ops"""
+    return np.char.add('DEV', rng.integers(10000, 99999, count).astype(str))
+
+
+def _stack_columns(blocks):
+    """Concatenate per-pattern column dicts into one array per column (scalars are broadcast)"""
+    columns = {}
+    for col in blocks[0]:
+        column = np.concatenate([
+            np.broadcast_to(block[col], len(block['amount'])) for block in blocks
+        ])
+        if col in COLUMN_DECIMALS:
+            column = np.round(column, COLUMN_DECIMALS[col])
+        dtype = COLUMN_DTYPES.get(col)
+        columns[col] = column if dtype is None else column.astype(dtype)
+    return columns
+
+
+def _legitimate_transactions(n, rng):
+    """Column arrays for n legitimate transactions"""
+    # Choose location type (0=metro, 1=tier2, 2=rural)
+    location_type = _weighted_choice(LOCATION_TYPE_CUM, n, rng)
+    location = np.where(location_type == 0, rng.choice(METRO_CITIES, n),
+                        np.where(location_type == 1, rng.choice(TIER2_CITIES, n),
+                                 rng.choice(RURAL_AREAS, n)))
     
-    Args:
-        n_samples: Total number of transactions
-        fraud_ratio: Proportion of fraudulent transactions
-    """
+    # Amount patterns: 60% small, 30% medium, 10% large amounts
+    amount_bucket = _weighted_choice(AMOUNT_BUCKET_CUM, n, rng)
+    amount = rng.uniform(AMOUNT_BUCKET_LOWS[amount_bucket], AMOUNT_BUCKET_HIGHS[amount_bucket])
     
-    n_fraud = int(n_samples * fraud_ratio)
-    n_legitimate = n_samples - n_fraud
+    # Device and account info
+    device_age = rng.uniform(30, 1000, n)
+    account_age = rng.uniform(100, 2000, n)
     
-    # Indian cities for realistic locations
-    metro_cities = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune']
-    tier2_cities = ['Lucknow', 'Jaipur', 'Ahmedabad', 'Surat', 'Nagpur', 'Indore', 'Chandigarh', 'Coimbatore']
-    rural_areas = ['Meerut', 'Bhopal', 'Amritsar', 'Mysore', 'Ranchi', 'Raipur', 'Guwahati', 'Dehradun']
-    
-    # Initialize lists
-    data = []
-    
-    print(f"Generating {n_legitimate} legitimate transactions...")
-    # Generate legitimate transactions
-    for i in range(n_legitimate):
-        # Choose location type
-        location_type = np.random.choice(['metro', 'tier2', 'rural'], p=[0.5, 0.3, 0.2])
-        if location_type == 'metro':
-            location = np.random.choice(metro_cities)
-            is_rural = 0
-        elif location_type == 'tier2':
-            location = np.random.choice(tier2_cities)
-            is_rural = 0
-        else:
-            location = np.random.choice(rural_areas)
-            is_rural = 1
-        
-        # Amount patterns
-        amount = np.random.choice([
-            np.random.uniform(10, 500),      # 60% small amounts
-            np.random.uniform(500, 2000),    # 30% medium amounts
-            np.random.uniform(2000, 10000)   # 10% large amounts
-        ], p=[0.6, 0.3, 0.1])
+    payee_balance_before = np.round(rng.uniform(1000, 50000, n), 2)
+    beneficiary_balance_before = np.round(rng.uniform(500, 30000, n), 2)
+    
+    return {
+        'amount': amount,
+        'time_slot': _weighted_choice(TIME_SLOT_CUM, n, rng),  # Morning, Afternoon, Evening, Night
+        'is_new_device': rng.random(n) < 0.05,  # 5% new device
+        'is_new_beneficiary': rng.random(n) < 0.3,  # 30% new beneficiary
+        'location_change': rng.random(n) < 0.1,  # 10% location change
+        'transaction_frequency': rng.poisson(3, size=n),  # Average 3 transactions per day
+        'past_fraud_flag': 0,  # No past fraud for legitimate users
+        'amount_deviation': rng.uniform(0, 0.3, n),  # Low deviation from user average
+        'beneficiary_trust_score': rng.uniform(0.7, 1.0, n),  # High trust
+        'device_age_days': device_age.astype(np.int16),
+        'account_age_days': account_age.astype(np.int16),
         
-        # Device and account info
-        device_age = np.random.uniform(30, 1000)
-        account_age = np.random.uniform(100, 2000)
+        # NEW COLUMNS
+        'beneficiary_change_velocity': rng.integers(0, 5, n),  # Low velocity for legitimate
+        'rapid_transactions_1h': rng.integers(0, 3, n),  # Low for legitimate
+        'upi_pin_failed_attempts': 0,  # No failed attempts for legitimate
+        'account_reports': 0,  # No reports for legitimate users
+        'location': location,
+        'device_id': _device_ids(n, rng),
+        'payee_balance_before': payee_balance_before,
+        'payee_balance_after': np.round(payee_balance_before - amount, 2),
+        'beneficiary_balance_before': beneficiary_balance_before,
+        'beneficiary_balance_after': np.round(beneficiary_balance_before + amount, 2),
         
-        transaction = {
-            'transaction_id': f'TXN{str(i+1).zfill(8)}',
-            'amount': amount,
-            'time_slot': np.random.choice([0, 1, 2, 3], p=[0.2, 0.4, 0.3, 0.1]),  # Morning, Afternoon, Evening, Night
-            'is_new_device': np.random.choice([0, 1], p=[0.95, 0.05]),  # 5% new device
-            'is_new_beneficiary': np.random.choice([0, 1], p=[0.7, 0.3]),  # 30% new beneficiary
-            'location_change': np.random.choice([0, 1], p=[0.9, 0.1]),  # 10% location change
-            'transaction_frequency': np.random.poisson(3),  # Average 3 transactions per day
-            'past_fraud_flag': 0,  # No past fraud for legitimate users
-            'amount_deviation': np.random.uniform(0, 0.3),  # Low deviation from user average
-            'beneficiary_trust_score': np.random.uniform(0.7, 1.0),  # High trust
-            'device_age_days': int(device_age),
-            'account_age_days': int(account_age),
-            
-            # NEW COLUMNS
-            'is_small_verification': 1 if amount < 10 else 0,
-            'is_first_time_user': 1 if account_age < 30 else 0,
-            'beneficiary_change_velocity': np.random.randint(0, 5),  # Low velocity for legitimate
-            'is_rural_user': is_rural,
-            'rapid_transactions_1h': np.random.randint(0, 3),  # Low for legitimate
-            'upi_pin_failed_attempts': 0,  # No failed attempts for legitimate
-            'account_reports': 0,  # No reports for legitimate users
-            'location': location,
-            'device_id': f'DEV{np.random.randint(10000, 99999)}',
-            'payee_balance_before': round(np.random.uniform(1000, 50000), 2),
-            'payee_balance_after': 0,  # Will calculate
-            'beneficiary_balance_before': round(np.random.uniform(500, 30000), 2),
-            'beneficiary_balance_after': 0,  # Will calculate
-            
-            'fraud_type': 'legitimate',
-            'is_fraud': 0
-        }
+        'fraud_type': FRAUD_TYPE_CODES['legitimate'],
+        'is_fraud': 0
+    }
+
+
+def _high_amount_fraud(k, rng):
+    """Column arrays for k fraud transactions: large amount fraud"""
+    # Fraud tends to come from varied locations
+    location = rng.choice(ALL_LOCATIONS, k)
+    amount = rng.uniform(10000, 50000, k)
+    device_age = rng.uniform(0, 10, k)
+    account_age = rng.uniform(10, 500, k)
+    payee_balance_before = np.round(rng.uniform(5000, 100000, k), 2)
+    beneficiary_balance_before = np.round(rng.uniform(100, 5000, k), 2)
+    
+    return {
+        'amount': amount,
+        'time_slot': 2 + (rng.random(k) < 0.7),  # Mostly night
+        'is_new_device': rng.random(k) < 0.7,  # Often new device
+        'is_new_beneficiary': 1,  # Always new beneficiary
+        'location_change': rng.random(k) < 0.6,
+        'transaction_frequency': rng.integers(8, 20, k),  # High frequency
+        'past_fraud_flag': rng.random(k) < 0.3,
+        'amount_deviation': rng.uniform(0.7, 1.5, k),  # High deviation
+        'beneficiary_trust_score': rng.uniform(0, 0.3, k),  # Low trust
+        'device_age_days': device_age.astype(np.int16),
+        'account_age_days': account_age.astype(np.int16),
         
-        # Calculate balances after transaction
-        transaction['payee_balance_after'] = round(transaction['payee_balance_before'] - amount, 2)
-        transaction['beneficiary_balance_after'] = round(transaction['beneficiary_balance_before'] + amount, 2)
+        # NEW COLUMNS - Fraud patterns
+        'beneficiary_change_velocity': rng.integers(5, 15, k),  # High velocity
+        'rapid_transactions_1h': rng.integers(5, 20, k),  # Many rapid transactions
+        'upi_pin_failed_attempts': rng.integers(0, 3, k),  # Some failed attempts
+        'account_reports': rng.random(k) < 0.3,  # Some reported
+        'location': location,
+        'device_id': _device_ids(k, rng),
+        'payee_balance_before': payee_balance_before,
+        'payee_balance_after': np.round(payee_balance_before - amount, 2),
+        'beneficiary_balance_before': beneficiary_balance_before,
+        'beneficiary_balance_after': np.round(beneficiary_balance_before + amount, 2),
         
-        data.append(transaction)
+        'fraud_type': FRAUD_TYPE_CODES['high_amount'],
+        'is_fraud': 1
+    }
+
+
+def _new_device_fraud(k, rng):
+    """Column arrays for k fraud transactions: new device + suspicious pattern"""
+    # Fraud tends to come from varied locations
+    location = rng.choice(ALL_LOCATIONS, k)
+    amount = rng.uniform(5000, 30000, k)
+    account_age = rng.uniform(50, 800, k)
+    payee_balance_before = np.round(rng.uniform(3000, 80000, k), 2)
+    beneficiary_balance_before = np.round(rng.uniform(200, 8000, k), 2)
     
-    print(f"Generating {n_fraud} fraudulent transactions...")
-    # Generate fraudulent transactions
-    for i in range(n_fraud):
-        # Fraud patterns
-        fraud_type = np.random.choice(['high_amount', 'new_device', 'night_rush', 'multiple_new'])
+    return {
+        'amount': amount,
+        'time_slot': rng.choice([1, 2, 3], size=k),
+        'is_new_device': 1,  # New device
+        'is_new_beneficiary': 1,
+        'location_change': 1,  # Location changed
+        'transaction_frequency': rng.integers(5, 15, k),
+        'past_fraud_flag': rng.random(k) < 0.2,
+        'amount_deviation': rng.uniform(0.5, 1.2, k),
+        'beneficiary_trust_score': rng.uniform(0, 0.4, k),
+        'device_age_days': np.zeros(k, dtype=np.int16),  # Brand new device
+        'account_age_days': account_age.astype(np.int16),
         
-        # Fraud tends to come from varied locations
-        location = np.random.choice(metro_cities + tier2_cities + rural_areas)
-        is_rural = 1 if location in rural_areas else 0
+        # NEW COLUMNS
+        'beneficiary_change_velocity': rng.integers(7, 15, k),
+        'rapid_transactions_1h': rng.integers(6, 18, k),
+        'upi_pin_failed_attempts': rng.integers(1, 4, k),  # Failed attempts on new device
+        'account_reports': rng.random(k) < 0.4,
+        'location': location,
+        'device_id': _device_ids(k, rng),
+        'payee_balance_before': payee_balance_before,
+        'payee_balance_after': np.round(payee_balance_before - amount, 2),
+        'beneficiary_balance_before': beneficiary_balance_before,
+        'beneficiary_balance_after': np.round(beneficiary_balance_before + amount, 2),
         
-        if fraud_type == 'high_amount':
-            # Large amount fraud
-            amount = np.random.uniform(10000, 50000)
-            device_age = np.random.uniform(0, 10)
-            account_age = np.random.uniform(10, 500)
-            
-            transaction = {
-                'transaction_id': f'TXN{str(n_legitimate + i + 1).zfill(8)}',
-                'amount': amount,
-                'time_slot': np.random.choice([2, 3], p=[0.3, 0.7]),  # Mostly night
-                'is_new_device': np.random.choice([0, 1], p=[0.3, 0.7]),  # Often new device
-                'is_new_beneficiary': 1,  # Always new beneficiary
-                'location_change': np.random.choice([0, 1], p=[0.4, 0.6]),
-                'transaction_frequency': np.random.randint(8, 20),  # High frequency
-                'past_fraud_flag': np.random.choice([0, 1], p=[0.7, 0.3]),
-                'amount_deviation': np.random.uniform(0.7, 1.5),  # High deviation
-                'beneficiary_trust_score': np.random.uniform(0, 0.3),  # Low trust
-                'device_age_days': int(device_age),
-                'account_age_days': int(account_age),
-                
-                # NEW COLUMNS - Fraud patterns
-                'is_small_verification': 0,  # Big fraud, not small test
-                'is_first_time_user': 1 if account_age < 30 else 0,
-                'beneficiary_change_velocity': np.random.randint(5, 15),  # High velocity
-                'is_rural_user': is_rural,
-                'rapid_transactions_1h': np.random.randint(5, 20),  # Many rapid transactions
-                'upi_pin_failed_attempts': np.random.randint(0, 3),  # Some failed attempts
-                'account_reports': np.random.choice([0, 1], p=[0.7, 0.3]),  # Some reported
-                'location': location,
-                'device_id': f'DEV{np.random.randint(10000, 99999)}',
-                'payee_balance_before': round(np.random.uniform(5000, 100000), 2),
-                'payee_balance_after': 0,
-                'beneficiary_balance_before': round(np.random.uniform(100, 5000), 2),
-                'beneficiary_balance_after': 0,
-                
-                'fraud_type': 'high_amount',
-                'is_fraud': 1
-            }
-            
-            transaction['payee_balance_after'] = round(transaction['payee_balance_before'] - amount, 2)
-            transaction['beneficiary_balance_after'] = round(transaction['beneficiary_balance_before'] + amount, 2)
+        'fraud_type': FRAUD_TYPE_CODES['new_device'],
+        'is_fraud': 1
+    }
+
+
+def _night_rush_fraud(k, rng):
+    """Column arrays for k fraud transactions: multiple night transactions"""
+    # Fraud tends to come from varied locations
+    location = rng.choice(ALL_LOCATIONS, k)
+    amount = rng.uniform(3000, 20000, k)
+    device_age = rng.uniform(0, 30, k)
+    account_age = rng.uniform(20, 600, k)
+    payee_balance_before = np.round(rng.uniform(2000, 70000, k), 2)
+    beneficiary_balance_before = np.round(rng.uniform(100, 3000, k), 2)
+    
+    return {
+        'amount': amount,
+        'time_slot': 3,  # Night only
+        'is_new_device': rng.random(k) < 0.5,
+        'is_new_beneficiary': 1,
+        'location_change': rng.random(k) < 0.7,
+        'transaction_frequency': rng.integers(10, 25, k),  # Very high frequency
+        'past_fraud_flag': rng.random(k) < 0.4,
+        'amount_deviation': rng.uniform(0.6, 1.3, k),
+        'beneficiary_trust_score': rng.uniform(0, 0.5, k),
+        'device_age_days': device_age.astype(np.int16),
+        'account_age_days': account_age.astype(np.int16),
         
-        elif fraud_type == 'new_device':
-            # New device + suspicious pattern
-            amount = np.random.uniform(5000, 30000)
-            account_age = np.random.uniform(50, 800)
-            
-            transaction = {
-                'transaction_id': f'TXN{str(n_legitimate + i + 1).zfill(8)}',
-                'amount': amount,
-                'time_slot': np.random.choice([1, 2, 3]),
-                'is_new_device': 1,  # New device
-                'is_new_beneficiary': 1,
-                'location_change': 1,  # Location changed
-                'transaction_frequency': np.random.randint(5, 15),
-                'past_fraud_flag': np.random.choice([0, 1], p=[0.8, 0.2]),
-                'amount_deviation': np.random.uniform(0.5, 1.2),
-                'beneficiary_trust_score': np.random.uniform(0, 0.4),
-                'device_age_days': 0,  # Brand new device
-                'account_age_days': int(account_age),
-                
-                # NEW COLUMNS
-                'is_small_verification': 0,
-                'is_first_time_user': 1 if account_age < 30 else 0,
-                'beneficiary_change_velocity': np.random.randint(7, 15),
-                'is_rural_user': is_rural,
-                'rapid_transactions_1h': np.random.randint(6, 18),
-                'upi_pin_failed_attempts': np.random.randint(1, 4),  # Failed attempts on new device
-                'account_reports': np.random.choice([0, 1], p=[0.6, 0.4]),
-                'location': location,
-                'device_id': f'DEV{np.random.randint(10000, 99999)}',
-                'payee_balance_before': round(np.random.uniform(3000, 80000), 2),
-                'payee_balance_after': 0,
-                'beneficiary_balance_before': round(np.random.uniform(200, 8000), 2),
-                'beneficiary_balance_after': 0,
-                
-                'fraud_type': 'new_device',
-                'is_fraud': 1
-            }
-            
-            transaction['payee_balance_after'] = round(transaction['payee_balance_before'] - amount, 2)
-            transaction['beneficiary_balance_after'] = round(transaction['beneficiary_balance_before'] + amount, 2)
+        # NEW COLUMNS
+        'beneficiary_change_velocity': rng.integers(8, 20, k),  # Very high
+        'rapid_transactions_1h': rng.integers(10, 25, k),  # Many at night
+        'upi_pin_failed_attempts': rng.integers(0, 2, k),
+        'account_reports': rng.random(k) < 0.5,
+        'location': location,
+        'device_id': _device_ids(k, rng),
+        'payee_balance_before': payee_balance_before,
+        'payee_balance_after': np.round(payee_balance_before - amount, 2),
+        'beneficiary_balance_before': beneficiary_balance_before,
+        'beneficiary_balance_after': np.round(beneficiary_balance_before + amount, 2),
         
-        elif fraud_type == 'night_rush':
-            # Multiple night transactions
-            amount = np.random.uniform(3000, 20000)
-            device_age = np.random.uniform(0, 30)
-            account_age = np.random.uniform(20, 600)
-            
-            transaction = {
-                'transaction_id': f'TXN{str(n_legitimate + i + 1).zfill(8)}',
-                'amount': amount,
-                'time_slot': 3,  # Night only
-                'is_new_device': np.random.choice([0, 1], p=[0.5, 0.5]),
-                'is_new_beneficiary': 1,
-                'location_change': np.random.choice([0, 1], p=[0.3, 0.7]),
-                'transaction_frequency': np.random.randint(10, 25),  # Very high frequency
-                'past_fraud_flag': np.random.choice([0, 1], p=[0.6, 0.4]),
-                'amount_deviation': np.random.uniform(0.6, 1.3),
-                'beneficiary_trust_score': np.random.uniform(0, 0.5),
-                'device_age_days': int(device_age),
-                'account_age_days': int(account_age),
-                
-                # NEW COLUMNS
-                'is_small_verification': 0,
-                'is_first_time_user': 1 if account_age < 30 else 0,
-                'beneficiary_change_velocity': np.random.randint(8, 20),  # Very high
-                'is_rural_user': is_rural,
-                'rapid_transactions_1h': np.random.randint(10, 25),  # Many at night
-                'upi_pin_failed_attempts': np.random.randint(0, 2),
-                'account_reports': np.random.choice([0, 1], p=[0.5, 0.5]),
-                'location': location,
-                'device_id': f'DEV{np.random.randint(10000, 99999)}',
-                'payee_balance_before': round(np.random.uniform(2000, 70000), 2),
-                'payee_balance_after': 0,
-                'beneficiary_balance_before': round(np.random.uniform(100, 3000), 2),
-                'beneficiary_balance_after': 0,
-                
-                'fraud_type': 'night_rush',
-                'is_fraud': 1
-            }
-            
-            transaction['payee_balance_after'] = round(transaction['payee_balance_before'] - amount, 2)
-            transaction['beneficiary_balance_after'] = round(transaction['beneficiary_balance_before'] + amount, 2)
+        'fraud_type': FRAUD_TYPE_CODES['night_rush'],
+        'is_fraud': 1
+    }
+
+
+def _multiple_new_fraud(k, rng):
+    """Column arrays for k fraud transactions: multiple new indicators + small verification pattern"""
+    # Fraud tends to come from varied locations
+    location = rng.choice(ALL_LOCATIONS, k)
+    amount = rng.uniform(2000, 25000, k)
+    device_age = rng.uniform(0, 5, k)
+    account_age = rng.uniform(5, 400, k)
+    
+    # 30% chance this is a small verification transaction before big fraud
+    is_small_test = rng.random(k) < 0.3
+    amount = np.where(is_small_test, rng.uniform(1, 9, k), amount)  # Small test amount
+    
+    payee_balance_before = np.round(rng.uniform(1000, 60000, k), 2)
+    beneficiary_balance_before = np.round(rng.uniform(50, 2000, k), 2)
+    
+    return {
+        'amount': amount,
+        'time_slot': rng.choice([2, 3], size=k),
+        'is_new_device': 1,
+        'is_new_beneficiary': 1,
+        'location_change': 1,
+        'transaction_frequency': rng.integers(7, 18, k),
+        'past_fraud_flag': rng.random(k) < 0.5,
+        'amount_deviation': rng.uniform(0.8, 1.6, k),
+        'beneficiary_trust_score': rng.uniform(0, 0.2, k),
+        'device_age_days': device_age.astype(np.int16),
+        'account_age_days': account_age.astype(np.int16),
         
-        else:  # multiple_new
-            # Multiple new indicators + small verification pattern
-            amount = np.random.uniform(2000, 25000)
-            device_age = np.random.uniform(0, 5)
-            account_age = np.random.uniform(5, 400)
-            
-            # 30% chance this is a small verification transaction before big fraud
-            if np.random.random() < 0.3:
-                amount = np.random.uniform(1, 9)  # Small test amount
-                is_small_verif = 1
-            else:
-                is_small_verif = 0
-            
-            transaction = {
-                'transaction_id': f'TXN{str(n_legitimate + i + 1).zfill(8)}',
-                'amount': amount,
-                'time_slot': np.random.choice([2, 3]),
-                'is_new_device': 1,
-                'is_new_beneficiary': 1,
-                'location_change': 1,
-                'transaction_frequency': np.random.randint(7, 18),
-                'past_fraud_flag': np.random.choice([0, 1], p=[0.5, 0.5]),
-                'amount_deviation': np.random.uniform(0.8, 1.6),
-                'beneficiary_trust_score': np.random.uniform(0, 0.2),
-                'device_age_days': int(device_age),
-                'account_age_days': int(account_age),
-                
-                # NEW COLUMNS
-                'is_small_verification': is_small_verif,
-                'is_first_time_user': 1 if account_age < 30 else 0,
-                'beneficiary_change_velocity': np.random.randint(10, 20),  # Very high
-                'is_rural_user': is_rural,
-                'rapid_transactions_1h': np.random.randint(8, 22),
-                'upi_pin_failed_attempts': np.random.randint(1, 5),  # Many failed attempts
-                'account_reports': np.random.choice([0, 1], p=[0.4, 0.6]),  # Often reported
-                'location': location,
-                'device_id': f'DEV{np.random.randint(10000, 99999)}',
-                'payee_balance_before': round(np.random.uniform(1000, 60000), 2),
-                'payee_balance_after': 0,
-                'beneficiary_balance_before': round(np.random.uniform(50, 2000), 2),
-                'beneficiary_balance_after': 0,
-                
-                'fraud_type': 'multiple_new',
-                'is_fraud': 1
-            }
-            
-            transaction['payee_balance_after'] = round(transaction['payee_balance_before'] - amount, 2)
-            transaction['beneficiary_balance_after'] = round(transaction['beneficiary_balance_before'] + amount, 2)
+        # NEW COLUMNS
+        'beneficiary_change_velocity': rng.integers(10, 20, k),  # Very high
+        'rapid_transactions_1h': rng.integers(8, 22, k),
+        'upi_pin_failed_attempts': rng.integers(1, 5, k),  # Many failed attempts
+        'account_reports': rng.random(k) < 0.6,  # Often reported
+        'location': location,
+        'device_id': _device_ids(k, rng),
+        'payee_balance_before': payee_balance_before,
+        'payee_balance_after': np.round(payee_balance_before - amount, 2),
+        'beneficiary_balance_before': beneficiary_balance_before,
+        'beneficiary_balance_after': np.round(beneficiary_balance_before + amount, 2),
         
-        data.append(transaction)
+        'fraud_type': FRAUD_TYPE_CODES['multiple_new'],
+        'is_fraud': 1
+    }
+
+
+# One vectorized generator per fraud pattern, indexed by pattern code
+FRAUD_GENERATORS = (
+    _high_amount_fraud,
+    _new_device_fraud,
+    _night_rush_fraud,
+    _multiple_new_fraud,
+)
+
+
+def _fraud_block(code, k, seed):
+    """Build one fraud pattern's batch from its own seed (module-level so worker processes can pickle it)"""
+    return FRAUD_GENERATORS[code](k, np.random.default_rng(seed))
+
+
+def generate_upi_transactions(n_samples=10000, fraud_ratio=0.15, seed=42, n_jobs=1):
+    """
+    Generate synthetic UPI transaction dataset
+    
+    Args:
+        n_samples: Total number of transactions
+        fraud_ratio: Proportion of fraudulent transactions
+        seed: Seed for the PCG64 generator (same seed, same dataset)
+        n_jobs: Worker processes for the fraud patterns (output is identical for any value)
+    """
+    return _generate_frame(n_samples, fraud_ratio, n_jobs, np.random.default_rng(seed))
+
+
+def generate_transaction_chunks(n_samples=1_000_000, fraud_ratio=0.15, chunk_size=100_000, seed=42, n_jobs=1):
+    """
+    Generate the dataset as a stream of DataFrames, holding one chunk in memory at a time
+    
+    Rows are shuffled within each chunk only, and transaction ids continue across chunks.
+    
+    Args:
+        n_samples: Total number of transactions
+        fraud_ratio: Proportion of fraudulent transactions in each chunk
+        chunk_size: Rows per chunk
+        seed: Root seed; each chunk draws from its own spawned child stream
+        n_jobs: Worker processes for the fraud patterns
+    """
+    starts = range(0, n_samples, chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    for start, chunk_seed in zip(starts, chunk_seeds):
+        count = min(chunk_size, n_samples - start)
+        print(f"Generating transactions {start + 1:,}-{start + count:,} of {n_samples:,}...")
+        yield _generate_frame(
+            count, fraud_ratio, n_jobs, np.random.default_rng(chunk_seed), first_id=start + 1, verbose=False
+        )
+
+
+def _generate_frame(n_samples, fraud_ratio, n_jobs, rng, first_id=1, verbose=True):
+    """Build and shuffle one frame of transactions with ids starting at first_id"""
+    n_fraud = int(n_samples * fraud_ratio)
+    n_legitimate = n_samples - n_fraud
     
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    if verbose:
+        print(f"Generating {n_legitimate} legitimate transactions...")
+    blocks = [_legitimate_transactions(n_legitimate, rng)]
     
-    # Shuffle the dataset
-    df = df.sample(frac=1).reset_index(drop=True)
+    if verbose:
+        print(f"Generating {n_fraud} fraudulent transactions...")
+    # Split the fraud budget across the patterns, then build one batch per pattern
+    codes = range(len(FRAUD_GENERATORS))
+    counts = np.bincount(rng.integers(0, len(FRAUD_GENERATORS), size=n_fraud), minlength=len(FRAUD_GENERATORS)).tolist()
+    # Each pattern gets an independent child stream, so serial and parallel runs match
+    seeds = np.random.SeedSequence(int(rng.integers(2**63))).spawn(len(FRAUD_GENERATORS))
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(FRAUD_GENERATORS))) as executor:
+            blocks.extend(executor.map(_fraud_block, codes, counts, seeds))
+    else:
+        blocks.extend(map(_fraud_block, codes, counts, seeds))
     
-    # Round numerical values
-    df['amount'] = df['amount'].round(2)
-    df['amount_deviation'] = df['amount_deviation'].round(3)
-    df['beneficiary_trust_score'] = df['beneficiary_trust_score'].round(3)
-    df['payee_balance_before'] = df['payee_balance_before'].round(2)
-    df['payee_balance_after'] = df['payee_balance_after'].round(2)
-    df['beneficiary_balance_before'] = df['beneficiary_balance_before'].round(2)
-    df['beneficiary_balance_after'] = df['beneficiary_balance_after'].round(2)
+    columns = _stack_columns(blocks)
+    columns['transaction_id'] = _transaction_ids(n_samples, first_id)
+    
+    # Flags that follow directly from other columns, computed once for all rows
+    columns['is_small_verification'] = (columns['amount'] < 10).astype(np.int8)
+    columns['is_first_time_user'] = (columns['account_age_days'] < 30).astype(np.int8)
+    columns['is_rural_user'] = np.isin(columns['location'], RURAL_AREAS).astype(np.int8)
+    
+    # Shuffle the dataset by permuting each column array once, then build the frame
+    perm = rng.permutation(n_samples)
+    df = pd.DataFrame({col: columns[col][perm] for col in COLUMNS})
+    
+    # Repeated strings become small integer codes + a categories index
+    df['location'] = pd.Categorical(df['location'], categories=ALL_LOCATIONS)
+    df['fraud_type'] = pd.Categorical.from_codes(df['fraud_type'], categories=FRAUD_TYPES)
     
     return df
 
 
-def save_dataset(df, output_dir='data/raw'):
-    """Save the generated dataset"""
+def _csv_table(df):
+    """Arrow table for the CSV writer, which wants plain strings instead of dictionary-encoded categoricals"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return pa.table(
+        [col.cast(pa.string()) if pa.types.is_dictionary(col.type) else col for col in table.columns],
+        names=table.column_names
+    )
+
+
+def save_dataset(df, output_dir='data/raw', write_csv=True, write_parquet=True):
+    """
+    Save the generated dataset
+    
+    Args:
+        df: Generated transactions
+        output_dir: Directory for the output files
+        write_csv: Write upi_transactions.csv
+        write_parquet: Write upi_transactions.parquet (columnar, zstd-compressed)
+    """
     os.makedirs(output_dir, exist_ok=True)
     
-    output_path = os.path.join(output_dir, 'upi_transactions.csv')
-    df.to_csv(output_path, index=False)
+    output_path = None
+    if write_parquet:
+        output_path = os.path.join(output_dir, 'upi_transactions.parquet')
+        df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
+        print(f"\n✅ Dataset saved to: {output_path}")
+    
+    if write_csv:
+        output_path = os.path.join(output_dir, 'upi_transactions.csv')
+        pacsv.write_csv(_csv_table(df), output_path, write_options=pacsv.WriteOptions(include_header=True))
+        print(f"\n✅ Dataset saved to: {output_path}")
     
-    print(f"\n✅ Dataset saved to: {output_path}")
     print(f"Total transactions: {len(df)}")
     print(f"Fraudulent: {df['is_fraud'].sum()} ({df['is_fraud'].mean()*100:.1f}%)")
     print(f"Legitimate: {(~df['is_fraud'].astype(bool)).sum()} ({(~df['is_fraud'].astype(bool)).mean()*100:.1f}%)")
@@ -317,6 +449,60 @@ def save_dataset(df, output_dir='data/raw'):
     return output_path
 
 
+def save_dataset_chunks(chunks, output_dir='data/raw', write_csv=True, write_parquet=True):
+    """
+    Stream generated chunks to disk, writing the CSV header and Parquet schema once
+    
+    Args:
+        chunks: Iterable of DataFrames, e.g. from generate_transaction_chunks()
+        output_dir: Directory for the output files
+        write_csv: Write upi_transactions.csv
+        write_parquet: Write upi_transactions.parquet (columnar, zstd-compressed)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, 'upi_transactions.csv')
+    parquet_path = os.path.join(output_dir, 'upi_transactions.parquet')
+    
+    csv_writer = None
+    parquet_writer = None
+    total = 0
+    n_fraud = 0
+    try:
+        for df in chunks:
+            if write_parquet:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(parquet_path, table.schema, compression='zstd')
+                parquet_writer.write_table(table)
+            if write_csv:
+                table = _csv_table(df)
+                if csv_writer is None:
+                    csv_writer = pacsv.CSVWriter(csv_path, table.schema)
+                csv_writer.write_table(table)
+            total += len(df)
+            n_fraud += int(df['is_fraud'].sum())
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if csv_writer is not None:
+            csv_writer.close()
+    
+    output_path = None
+    if write_parquet:
+        output_path = parquet_path
+        print(f"\n✅ Dataset saved to: {output_path}")
+    if write_csv:
+        output_path = csv_path
+        print(f"\n✅ Dataset saved to: {output_path}")
+    
+    if total:
+        print(f"Total transactions: {total}")
+        print(f"Fraudulent: {n_fraud} ({n_fraud/total*100:.1f}%)")
+        print(f"Legitimate: {total - n_fraud} ({(total - n_fraud)/total*100:.1f}%)")
+    
+    return output_path
+
+
 def print_dataset_stats(df):
     """Print comprehensive dataset statistics"""
     print("\n" + "="*60)
@@ -334,6 +520,7 @@ def print_dataset_stats(df):
     print("FRAUD TYPE BREAKDOWN")
     print("-"*60)
     fraud_types = fraud_df['fraud_type'].value_counts()
+    fraud_types = fraud_types[fraud_types > 0]  # Categorical counts include unused types
     for fraud_type, count in fraud_types.items():
         print(f"  {fraud_type.replace('_', ' ').title():.<40} {count:>5,} ({count/len(fraud_df)*100:>5.1f}%)")
     
@@ -341,6 +528,7 @@ def print_dataset_stats(df):
     print("LOCATION INTELLIGENCE")
     print("-"*60)
     location_fraud = df[df['is_fraud'] == 1]['location'].value_counts().head(5)
+    location_fraud = location_fraud[location_fraud > 0]
     print("Top 5 High-Risk Cities:")
     for city, count in location_fraud.items():
         print(f"  {city:.<40} {count:>5,} frauds")
@@ -348,11 +536,13 @@ def print_dataset_stats(df):
     print("\n" + "-"*60)
     print("ENHANCED FEATURES SNAPSHOT")
     print("-"*60)
-    print(f"  Small Verification Txns: {df['is_small_verification'].sum():,}")
-    print(f"  First-Time Users: {df['is_first_time_user'].sum():,}")
-    print(f"  Rural Transactions: {df['is_rural_user'].sum():,}")
-    print(f"  Total PIN Failures: {df['upi_pin_failed_attempts'].sum():,.0f}")
-    print(f"  Total Account Reports: {df['account_reports'].sum():,.0f}")
+    sums = df[['is_small_verification', 'is_first_time_user', 'is_rural_user',
+               'upi_pin_failed_attempts', 'account_reports']].sum()
+    print(f"  Small Verification Txns: {sums['is_small_verification']:,}")
+    print(f"  First-Time Users: {sums['is_first_time_user']:,}")
+    print(f"  Rural Transactions: {sums['is_rural_user']:,}")
+    print(f"  Total PIN Failures: {sums['upi_pin_failed_attempts']:,.0f}")
+    print(f"  Total Account Reports: {sums['account_reports']:,.0f}")
     print(f"  Rapid Transactions (1h): {df[df['rapid_transactions_1h'] > 0]['rapid_transactions_1h'].sum():,.0f}")
     
     print("\n" + "-"*60)
@@ -367,8 +557,9 @@ def print_dataset_stats(df):
     print("TIME DISTRIBUTION")
     print("-"*60)
     time_mapping = {0: 'Morning', 1: 'Afternoon', 2: 'Evening', 3: 'Night'}
+    time_counts = df['time_slot'].value_counts().reindex(list(time_mapping), fill_value=0)
     for time_val, time_name in time_mapping.items():
-        count = (df['time_slot'] == time_val).sum()
+        count = time_counts[time_val]
         print(f"  {time_name:.<40} {count:>5,} ({count/len(df)*100:>5.1f}%)")
     
     print("\n" + "="*60)
@@ -4,9 +4,66 @@ Analyzes SMS/messages for fraud patterns and suspicious keywords
 """
 
 import re
+import threading
+from collections import OrderedDict
+
+# Score added per keyword found in each fraud keyword category
+KEYWORD_SCORES = {
+    'high_risk': 25,
+    'medium_risk': 10,
+    'impersonation': 20,
+}
+
+
+def _build_keyword_scanner(keywords, nestable):
+    """
+    Compile keywords into one single-pass scanner
+    
+    The lookahead reports the longest keyword starting at each position; the
+    keywords that are prefixes of it start there too. The returned map gives,
+    for each reported keyword, the entries always counted at that position
+    (not `nestable`), the entries of the longest `nestable` prefix, and that
+    prefix's length, so the caller can drop nestable matches wholly covered by
+    a longer nestable match.
+    """
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    scanner = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))')
+    starting_with = {}
+    for longest in ordered:
+        prefixes = [i for i, keyword in enumerate(keywords) if longest.startswith(keyword)]
+        nested = max((len(keywords[i]) for i in prefixes if nestable[i]), default=0)
+        starting_with[longest] = (
+            frozenset(i for i in prefixes if not nestable[i]),
+            frozenset(i for i in prefixes if nestable[i] and len(keywords[i]) == nested),
+            nested,
+        )
+    return scanner, starting_with
+
+
+# Fraud type labels in priority order, each with the keywords that indicate it
+FRAUD_TYPE_KEYWORDS = (
+    ('OTP/Credential Phishing', ('otp', 'pin', 'cvv', 'password')),
+    ('Fake Refund Scam', ('refund', 'reversed', 'credited back')),
+    ('Prize/Lottery Scam', ('lottery', 'prize', 'won', 'congratulations')),
+    ('Fake Courier Scam', ('courier', 'parcel', 'customs', 'detained')),
+    ('KYC Update Scam', ('kyc', 'verify account', 'update details')),
+    ('Threatening/Legal Scam', ('arrest', 'legal action', 'police', 'warrant')),
+    ('Fake Tax Refund', ('tax refund', 'income tax', 'gst refund')),
+)
+
+# One named group per fraud type; at a shared start position the higher-priority type wins
+_FRAUD_TYPE_SCANNER = re.compile('(?=' + '|'.join(
+    f"(?P<t{i}>{'|'.join(map(re.escape, keywords))})"
+    for i, (_, keywords) in enumerate(FRAUD_TYPE_KEYWORDS)
+) + ')')
+
 
 class MessageFilter:
-    def __init__(self):
+    def __init__(self, cache_size=10000):
+        """
+        Args:
+            cache_size: Number of recent analyze_message results kept for repeated messages (0 disables)
+        """
         # Fraud keywords and patterns
         self.fraud_keywords = {
             'high_risk': [
@@ -36,13 +93,16 @@ class MessageFilter:
             ]
         }
         
-        # Suspicious patterns (regex)
+        # Suspicious patterns (regex), compiled once: (pattern, flag, score)
         self.suspicious_patterns = [
-            r'\b\d{4}\s*\d{4}\s*\d{4}\s*\d{4}\b',  # Card numbers
-            r'\b\d{3,4}\b.*\b\d{3,4}\b',  # OTP-like patterns
-            r'https?://[^\s]+',  # URLs
-            r'\b\d{10}\b',  # Phone numbers
-            r'bit\.ly|tinyurl|goo\.gl',  # Shortened URLs
+            (re.compile(pattern, re.IGNORECASE), flag, score)
+            for pattern, flag, score in [
+                (r'\b\d{4}\s*\d{4}\s*\d{4}\s*\d{4}\b', "🔢 Contains sensitive pattern", 15),  # Card numbers
+                (r'\b\d{3,4}\b.*\b\d{3,4}\b', "🔢 Contains sensitive pattern", 15),  # OTP-like patterns
+                (r'https?://[^\s]+', "🔗 Contains suspicious link", 20),  # URLs
+                (r'\b\d{10}\b', "📞 Contains phone number", 15),  # Phone numbers
+                (r'bit\.ly|tinyurl|goo\.gl', "🔗 Contains shortened URL", 25),  # Shortened URLs
+            ]
         ]
         
         # Legitimate transaction keywords (reduces false positives)
@@ -51,12 +111,78 @@ class MessageFilter:
             'debited from account', 'balance is', 'available balance',
             'thank you for', 'order confirmed', 'booking confirmed'
         ]
+        
+        # Urgency tactics (two or more raise the score)
+        self.urgency_words = ['urgent', 'immediately', 'now', 'today', 'expire', 'limited time']
+        
+        # (category, keyword) for every keyword list, in list order, scanned in one pass
+        keyword_lists = {
+            **self.fraud_keywords,
+            'urgency': self.urgency_words,
+            'legitimate': self.legitimate_keywords,
+        }
+        self._keyword_entries = [
+            (category, keyword)
+            for category, keywords in keyword_lists.items()
+            for keyword in keywords
+        ]
+        self._keyword_categories = tuple(keyword_lists)
+        
+        # LRU cache of analysis results; SMS templates repeat heavily
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._keyword_scanner, self._keyword_indices = _build_keyword_scanner(
+            [keyword for _, keyword in self._keyword_entries],
+            [category in KEYWORD_SCORES for category, _ in self._keyword_entries],
+        )
+    
+    def _find_keywords(self, message_lower):
+        """Keywords present in the message, grouped by category in list order"""
+        hits = set()
+        # A fraud keyword inside a longer fraud keyword's span ('verify' in 'verify
+        # your account', 'urgent' in 'send money urgently') is not scored again;
+        # urgency and legitimate keywords always count
+        covered_until = 0
+        for match in self._keyword_scanner.finditer(message_lower):
+            always, fraud, fraud_len = self._keyword_indices[match.group(1)]
+            hits |= always
+            end = match.start() + fraud_len
+            if fraud and end > covered_until:
+                hits |= fraud
+                covered_until = end
+        
+        found = {category: [] for category in self._keyword_categories}
+        for i in sorted(hits):
+            category, keyword = self._keyword_entries[i]
+            found[category].append(keyword)
+        return found
     
     def analyze_message(self, message):
         """
         Analyze message for fraud indicators
         Returns: dict with fraud_detected, risk_level, flags, and recommendation
         """
+        if self.cache_size <= 0:
+            return self._analyze_message(message)
+        
+        with self._cache_lock:
+            result = self._cache.get(message)
+            if result is not None:
+                self._cache.move_to_end(message)
+        
+        if result is None:
+            result = self._analyze_message(message)
+            with self._cache_lock:
+                self._cache[message] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        # Callers get their own copy so cached entries can't be mutated
+        return {**result, 'flags': list(result['flags'])}
+    
+    def _analyze_message(self, message):
+        """Uncached analysis behind analyze_message"""
         if not message or not message.strip():
             return {
                 'fraud_detected': False,
@@ -71,58 +197,36 @@ class MessageFilter:
         flags = []
         fraud_score = 0
         
-        # Check for legitimate transaction patterns first
-        is_legitimate = any(keyword in message_lower for keyword in self.legitimate_keywords)
+        # Check every keyword list in a single scan
+        found = self._find_keywords(message_lower)
+        for category, score in KEYWORD_SCORES.items():
+            fraud_score += score * len(found[category])
         
-        # Check high-risk keywords
-        high_risk_found = []
-        for keyword in self.fraud_keywords['high_risk']:
-            if keyword in message_lower:
-                high_risk_found.append(keyword)
-                fraud_score += 25
+        # Check for legitimate transaction patterns
+        is_legitimate = bool(found['legitimate'])
         
+        high_risk_found = found['high_risk']
         if high_risk_found:
             flags.append(f"🚨 High-risk keywords: {', '.join(high_risk_found[:3])}")
         
         # Check medium-risk keywords
-        medium_risk_found = []
-        for keyword in self.fraud_keywords['medium_risk']:
-            if keyword in message_lower:
-                medium_risk_found.append(keyword)
-                fraud_score += 10
-        
+        medium_risk_found = found['medium_risk']
         if medium_risk_found:
             flags.append(f"⚠️ Suspicious keywords: {', '.join(medium_risk_found[:3])}")
         
         # Check impersonation attempts
-        impersonation_found = []
-        for keyword in self.fraud_keywords['impersonation']:
-            if keyword in message_lower:
-                impersonation_found.append(keyword)
-                fraud_score += 20
-        
+        impersonation_found = found['impersonation']
         if impersonation_found:
             flags.append(f"🎭 Impersonation attempt: {', '.join(impersonation_found[:2])}")
         
         # Check suspicious patterns
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, message, re.IGNORECASE):
-                if 'http' in pattern:
-                    flags.append("🔗 Contains suspicious link")
-                    fraud_score += 20
-                elif 'bit.ly' in pattern or 'tinyurl' in pattern:
-                    flags.append("🔗 Contains shortened URL")
-                    fraud_score += 25
-                elif r'\d{10}' in pattern:
-                    flags.append("📞 Contains phone number")
-                    fraud_score += 15
-                else:
-                    flags.append("🔢 Contains sensitive pattern")
-                    fraud_score += 15
+        for pattern, flag, score in self.suspicious_patterns:
+            if pattern.search(message):
+                flags.append(flag)
+                fraud_score += score
         
         # Check for urgency tactics
-        urgency_words = ['urgent', 'immediately', 'now', 'today', 'expire', 'limited time']
-        urgency_count = sum(1 for word in urgency_words if word in message_lower)
+        urgency_count = len(found['urgency'])
         if urgency_count >= 2:
             flags.append("⏰ Creates false urgency")
             fraud_score += 15
@@ -163,21 +267,12 @@ class MessageFilter:
 
     def get_fraud_type(self, message):
         """Identify specific fraud type from message"""
-        message_lower = message.lower()
+        best = len(FRAUD_TYPE_KEYWORDS)
+        for match in _FRAUD_TYPE_SCANNER.finditer(message.lower()):
+            best = min(best, int(match.lastgroup[1:]))
+            if best == 0:
+                break
         
-        if any(word in message_lower for word in ['otp', 'pin', 'cvv', 'password']):
-            return 'OTP/Credential Phishing'
-        elif any(word in message_lower for word in ['refund', 'reversed', 'credited back']):
-            return 'Fake Refund Scam'
-        elif any(word in message_lower for word in ['lottery', 'prize', 'won', 'congratulations']):
-            return 'Prize/Lottery Scam'
-        elif any(word in message_lower for word in ['courier', 'parcel', 'customs', 'detained']):
-            return 'Fake Courier Scam'
-        elif any(word in message_lower for word in ['kyc', 'verify account', 'update details']):
-            return 'KYC Update Scam'
-        elif any(word in message_lower for word in ['arrest', 'legal action', 'police', 'warrant']):
-            return 'Threatening/Legal Scam'
-        elif any(word in message_lower for word in ['tax refund', 'income tax', 'gst refund']):
-            return 'Fake Tax Refund'
-        else:
-            return 'General Phishing'
+        if best < len(FRAUD_TYPE_KEYWORDS):
+            return FRAUD_TYPE_KEYWORDS[best][0]
+        return 'General Phishing'
@@ -4,37 +4,353 @@ Loads trained models and provides prediction functionality
 """
 
 import numpy as np
-import pandas as pd
-import joblib
+from scipy.special import expit
 import os
 import json
+import copy
+import atexit
+import queue
+import threading
+import time
+import operator
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
 
+try:
+    import onnxruntime as ort
+except ImportError:  # Optional: scoring falls back to the joblib model
+    ort = None
+
+try:
+    import orjson
+except ImportError:  # Optional: logging falls back to the stdlib json module
+    orjson = None
+
+
+# Risk buckets by fraud probability: HIGH >= 0.55, MEDIUM >= 0.3, else LOW
+RISK_LEVELS = ('HIGH', 'MEDIUM', 'LOW')
+RISK_DECISIONS = ('BLOCK', 'WARN', 'ALLOW')
+RISK_COLORS = ('red', 'orange', 'green')
+
+# sklearn trees and ONNX graphs compare features in float32, so rows are built
+# in that precision up front (amounts keep paisa resolution up to ~₹1.3 lakh)
+FEATURE_DTYPE = np.float32
+
+# onnxruntime averages tree votes in float32, landing just below exact ensemble
+# averages (0.55 -> 0.5499996); probabilities are rounded to this many decimals
+# in float64 so the risk buckets match the joblib model's
+ONNX_PROBA_DECIMALS = 5
+
+TIME_NAMES = {0: 'Morning', 1: 'Afternoon', 2: 'Evening', 3: 'Night', 4: 'Late Night'}
+
+# Explanation rules in display order: (field, default, comparison, threshold, reason)
+# A default of None marks a field every transaction must provide.
+EXPLANATION_RULES = (
+    ('amount', None, operator.gt, 20000, lambda t: f"High transaction amount (₹{t['amount']:.2f})"),
+    ('time_slot', None, operator.ge, 3, lambda t: f"Transaction at night ({TIME_NAMES.get(t['time_slot'], 'Unknown')})"),
+    ('is_new_device', None, operator.eq, 1, lambda t: "New device detected"),
+    ('is_new_beneficiary', None, operator.eq, 1, lambda t: "New beneficiary"),
+    ('location_change', None, operator.eq, 1, lambda t: "Location change detected"),
+    ('transaction_frequency', None, operator.gt, 10, lambda t: f"High transaction frequency ({t['transaction_frequency']} in 24h)"),
+    ('past_fraud_flag', None, operator.eq, 1, lambda t: "Past fraud activity detected"),
+    ('amount_deviation', None, operator.gt, 0.7, lambda t: f"Amount deviates from user pattern ({t['amount_deviation']:.2f})"),
+    ('beneficiary_trust_score', None, operator.lt, 0.4, lambda t: f"Low beneficiary trust score ({t['beneficiary_trust_score']:.2f})"),
+    ('device_age_days', 999, operator.lt, 7, lambda t: f"Very new device ({t['device_age_days']} days old)"),
+    ('is_small_verification', 0, operator.eq, 1, lambda t: "Small verification transaction detected (possible precursor to fraud)"),
+    ('upi_pin_failed_attempts', 0, operator.gt, 0, lambda t: f"{t['upi_pin_failed_attempts']} failed PIN attempts"),
+    ('rapid_transactions_1h', 0, operator.gt, 5, lambda t: f"Rapid transactions: {t['rapid_transactions_1h']} in last hour"),
+    ('account_reports', 0, operator.gt, 0, lambda t: "Account has been reported for suspicious activity"),
+    ('beneficiary_change_velocity', 0, operator.gt, 10, lambda t: f"High beneficiary changes ({t['beneficiary_change_velocity']})"),
+    ('is_first_time_user', 0, operator.eq, 1, lambda t: "First-time user"),
+    ('is_rural_user', 0, operator.eq, 1, lambda t: f"Transaction from rural area ({t.get('location', 'Unknown')})"),
+)
+
+# Batches at least this large are scored with the model's trees spread across all cores
+PARALLEL_BATCH_ROWS = 1000
+# ...or, for models without n_jobs, split into this many row chunks scored on threads
+BATCH_THREADS = os.cpu_count() or 1
+# Initial rows in each thread's reusable batch feature buffer
+BATCH_BUFFER_ROWS = 4096
+
+# Essential fields kept per transaction in the pattern-detection history
+# (timestamp is time.time_ns(), compared as an integer)
+HistEntry = namedtuple('HistEntry', 'amount device_id timestamp is_new_device')
+
+# Input fields copied into each prediction log entry
+LOGGED_INPUT_FIELDS = frozenset([
+    'amount', 'time_slot', 'is_new_device', 'is_new_beneficiary', 'transaction_frequency', 'past_fraud_flag'
+])
+
+# History entries searched for a small test transaction from the same device
+VERIFICATION_LOOKBACK = 20
+# ...and how recent that test transaction must be (10 minutes)
+VERIFICATION_WINDOW_NS = 10 * 60 * 1_000_000_000
+
+# HYPER-AGGRESSIVE risk features (must match training exactly):
+# (risk feature, input field, default when absent, comparison, threshold, weight)
+RISK_RULES = (
+    ('night_risk', 'time_slot', 0, operator.ge, 2, 4),
+    ('new_device_risk', 'is_new_device', 0, operator.eq, 1, 5),
+    ('high_amount_risk', 'amount', 0, operator.gt, 20000, 3),
+    ('low_trust_risk', 'beneficiary_trust_score', 1.0, operator.lt, 0.3, 3),
+    ('rapid_trans_risk', 'rapid_transactions_1h', 0, operator.gt, 10, 3),
+    ('pin_failure_risk', 'upi_pin_failed_attempts', 0, operator.gt, 0, 3),
+    ('velocity_risk', 'beneficiary_change_velocity', 0, operator.gt, 5, 2),
+)
+# suspicious_combo needs all of these together (night, new device, amount over ₹15,000)
+SUSPICIOUS_COMBO_RULES = (
+    ('time_slot', operator.ge, 2),
+    ('is_new_device', operator.eq, 1),
+    ('amount', operator.gt, 15000),
+)
+SUSPICIOUS_COMBO_WEIGHT = 8
+
+# Opt-in prefilter: amounts below this with no risk feature firing skip the model
+PREFILTER_MAX_AMOUNT = 5000
+
+# Inputs to the risk features, with the value used when a field is absent
+RISK_INPUTS = tuple((field, default) for _, field, default, _, _, _ in RISK_RULES)
+RISK_FEATURE_NAMES = tuple(name for name, *_ in RISK_RULES) + ('suspicious_combo',)
+
+# Fraud type indicators: (field, default, comparison, threshold, fraud type, points)
+FRAUD_TYPE_RULES = (
+    ('amount', 0, operator.gt, 10000, 'high_amount', 3),
+    ('amount_deviation', 0, operator.gt, 0.7, 'high_amount', 2),
+    ('upi_pin_failed_attempts', 0, operator.gt, 0, 'high_amount', 2),
+    ('is_new_device', 0, operator.eq, 1, 'new_device', 4),
+    ('device_age_days', 999, operator.lt, 30, 'new_device', 2),
+    ('is_small_verification', 0, operator.eq, 1, 'new_device', 3),
+    ('time_slot', 0, operator.eq, 3, 'night_rush', 3),
+    ('rapid_transactions_1h', 0, operator.gt, 5, 'night_rush', 4),
+    ('transaction_frequency', 0, operator.gt, 10, 'night_rush', 2),
+    ('is_new_beneficiary', 0, operator.eq, 1, 'multiple_new', 3),
+    ('beneficiary_change_velocity', 0, operator.gt, 5, 'multiple_new', 4),
+    ('beneficiary_trust_score', 1, operator.lt, 0.3, 'multiple_new', 2),
+)
+# Ties go to the type listed first
+FRAUD_TYPES = ('high_amount', 'new_device', 'night_rush', 'multiple_new')
+# Index into FRAUD_TYPES of each rule's fraud type
+FRAUD_TYPE_COLUMNS = tuple(FRAUD_TYPES.index(fraud_type) for *_, fraud_type, _ in FRAUD_TYPE_RULES)
+# The same rules as a (rules, fraud types) points matrix for batches
+FRAUD_TYPE_POINTS = np.array([
+    [points if fraud_type == column else 0 for column in FRAUD_TYPES]
+    for *_, fraud_type, points in FRAUD_TYPE_RULES
+], dtype=np.int16)
+
+# Tiered vulnerability factors: (field, default, upper bounds, points for the first bound below)
+VULNERABILITY_TIERS = (
+    ('account_age_days', 365, (30, 90, 180, 365), (20, 15, 10, 5)),  # Account age (20 points)
+    ('device_age_days', 180, (7, 30, 90), (15, 10, 5)),  # Device trust (15 points)
+)
+# Flat vulnerability factors: (field, default, comparison, threshold, points)
+VULNERABILITY_RULES = (
+    ('rapid_transactions_1h', 0, operator.gt, 5, 10),  # Behavioral patterns (25 points)
+    ('upi_pin_failed_attempts', 0, operator.gt, 0, 15),
+    ('account_reports', 0, operator.gt, 0, 15),  # Account reputation (20 points)
+    ('past_fraud_flag', 0, operator.eq, 1, 5),
+    ('is_rural_user', 0, operator.eq, 1, 5),  # Location risk (10 points)
+    ('location_change', 0, operator.eq, 1, 5),
+)
+# Beneficiary trust adds int((1 - trust) * 10), up to 10 points
+VULNERABILITY_TRUST_DEFAULT = 0.5
+MAX_VULNERABILITY = 100
+
+NORMAL_EXPLANATION = "Transaction appears normal based on user patterns and behavioral analysis"
+
+
+# Prediction log entries from every predictor go through one queue to one writer
+# thread holding an append handle per log file. predict() only enqueues; the writer
+# serializes whatever has queued up and writes it in one go. Nothing here refers
+# back to a predictor, so a replaced predictor and its model can be freed.
+_log_queue = queue.SimpleQueue()
+_log_writer = None
+_log_writer_lock = threading.Lock()
+# Longest wait for the writer when flushing at close or exit, so a stalled
+# write (full disk, hung network mount) can't block shutdown
+LOG_FLUSH_TIMEOUT = 5.0
+
+
+def _enqueue_log(log_file, log_entry):
+    """Queue a log entry for the shared writer thread, starting it on first use"""
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = threading.Thread(target=_drain_log, name='prediction-log', daemon=True)
+                _log_writer.start()
+    _log_queue.put((log_file, log_entry))
+
+
+def _drain_log():
+    """Writer thread: serialize queued log entries and append them to their files"""
+    handles = {}
+    while True:
+        items = [_log_queue.get()]
+        while True:
+            try:
+                items.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        lines = {}
+        flushed = []
+        for item in items:
+            if isinstance(item, threading.Event):
+                flushed.append(item)
+                continue
+            log_file, log_entry = item
+            try:
+                if orjson is not None:
+                    line = orjson.dumps(log_entry, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n'
+                else:
+                    line = (json.dumps(log_entry) + '\n').encode()
+            except Exception as e:
+                print(f"⚠️ Logging failed: {e}")
+                continue
+            lines.setdefault(log_file, []).append(line)
+        
+        for log_file, file_lines in lines.items():
+            try:
+                fh = handles.get(log_file)
+                if fh is None:
+                    fh = handles[log_file] = open(log_file, 'ab')
+                fh.write(b''.join(file_lines))
+                fh.flush()
+            except Exception as e:
+                print(f"⚠️ Logging failed: {e}")
+        
+        for event in flushed:
+            event.set()
+
+
+def flush_prediction_log(timeout=None):
+    """Block until every prediction log entry queued so far has been written"""
+    if _log_writer is None:
+        return
+    done = threading.Event()
+    _log_queue.put(done)
+    done.wait(timeout)
+
+
+atexit.register(flush_prediction_log, LOG_FLUSH_TIMEOUT)
+
+
+def _rule_value(transaction_data, field, default):
+    """Field value for an explanation rule (required fields raise KeyError when missing)"""
+    if default is None:
+        return transaction_data[field]
+    return transaction_data.get(field, default)
+
+
+def _batch_column(transactions, field, default):
+    """One field across a batch of transactions as an array"""
+    return np.array([_rule_value(txn, field, default) for txn in transactions])
+
+
+def _risk_bucket(fraud_probability):
+    """Index into RISK_LEVELS for each probability (thresholds lowered from 0.8/0.5 to 0.55/0.3)"""
+    return np.select([fraud_probability >= 0.55, fraud_probability >= 0.3], [0, 1], default=2)
+
+
+def _onnx_fraud_probability(proba):
+    """Fraud-class column of an ONNX (N, 2) float32 probability output, as comparable float64"""
+    return np.round(proba[:, 1].astype(np.float64), ONNX_PROBA_DECIMALS)
+
+
+def _risk_features(inputs):
+    """Evaluate RISK_RULES on a dict of inputs: scalars for one row, or whole batch columns"""
+    risk = {name: op(inputs[field], threshold) * weight for name, field, _, op, threshold, weight in RISK_RULES}
+    combo = True
+    for field, op, threshold in SUSPICIOUS_COMBO_RULES:
+        combo = combo & op(inputs[field], threshold)
+    risk['suspicious_combo'] = combo * SUSPICIOUS_COMBO_WEIGHT
+    return risk
+
+
+@lru_cache(maxsize=4096)
+def _classify_fraud_type(values):
+    """Fraud type with the highest FRAUD_TYPE_RULES score (memoized: streams repeat feature combinations)"""
+    scores = [0] * len(FRAUD_TYPES)
+    for value, column, (_, _, compare, threshold, _, points) in zip(values, FRAUD_TYPE_COLUMNS, FRAUD_TYPE_RULES):
+        if compare(value, threshold):
+            scores[column] += points
+    return FRAUD_TYPES[scores.index(max(scores))]
+
+
+@lru_cache(maxsize=4096)
+def _vulnerability_score(tier_values, rule_values, trust_score):
+    """Vulnerability score (0-100) from the vulnerability tables' values (memoized like _classify_fraud_type)"""
+    vulnerability = 0
+    for value, (_, _, bounds, tier_points) in zip(tier_values, VULNERABILITY_TIERS):
+        for bound, points in zip(bounds, tier_points):
+            if value < bound:
+                vulnerability += points
+                break
+    for value, (_, _, compare, threshold, points) in zip(rule_values, VULNERABILITY_RULES):
+        if compare(value, threshold):
+            vulnerability += points
+    vulnerability += int((1 - trust_score) * 10)
+    return min(vulnerability, MAX_VULNERABILITY)
+
 
 class FraudPredictor:
     """Real-time fraud prediction"""
     
-    def __init__(self, model_dir='models', model_type='random_forest'):
+    __slots__ = (
+        'model_dir', 'model_type', 'prefilter', 'model', 'feature_names', 'log_file',
+        'max_history_size', 'transaction_history',
+        '_small_by_device', '_history_seq', '_n_features',
+        '_needs_frame', '_frame_columns', '_onnx_session', '_onnx_input', '_batch_model', '_batch_pool',
+        '_feature_index', '_defaults_row', '_required_features', '_risk_positions', '_balance_after_pos',
+        '_batch_buffers',
+    )
+    
+    # Default values for missing features (20 base features)
+    _DEFAULT_FEATURES = {
+        'is_small_verification': 0,
+        'is_first_time_user': 0,
+        'beneficiary_change_velocity': 1,
+        'is_rural_user': 0,
+        'rapid_transactions_1h': 0,
+        'upi_pin_failed_attempts': 0,
+        'account_reports': 0,
+        'location': 0,  # Encoded location
+        'device_id': 1234,  # Encoded device_id (numeric for model)
+        'payee_balance_before': 10000.0,
+        'payee_balance_after': 0.0,
+    }
+    
+    def __init__(self, model_dir='models', model_type='random_forest', prefilter=False):
         """
         Initialize predictor
         
         Args:
             model_dir: Directory containing saved models
-            model_type: 'random_forest', 'xgboost', or 'isolation_forest'
+            model_type: 'random_forest', 'xgboost', 'hist_gradient_boosting', or 'isolation_forest'
+            prefilter: Return LOW/ALLOW for obviously legitimate transactions without
+                calling the model (small daytime amount, no risk feature fires)
         """
         self.model_dir = model_dir
         self.model_type = model_type
+        self.prefilter = prefilter
         self.model = None
-        self.scaler = None
         self.feature_names = None
         
         # Create logs directory
         os.makedirs('logs', exist_ok=True)
         self.log_file = 'logs/predictions.log'
+
         
         # Transaction history for pattern detection (in-memory for demo)
-        self.transaction_history = []
         self.max_history_size = 100
+        self.transaction_history = deque(maxlen=self.max_history_size)
+        
+        # device_id -> (amount, sequence no., time_ns) of its latest small (<= ₹10)
+        # transaction still inside the verification lookback window
+        self._small_by_device = {}
+        self._history_seq = 0
         
         self.load_model()
     
@@ -44,8 +360,50 @@ class FraudPredictor:
             model_path = os.path.join(self.model_dir, f'{self.model_type}.joblib')
             feature_path = os.path.join(self.model_dir, 'feature_names.joblib')
             
-            self.model = joblib.load(model_path)
-            self.feature_names = joblib.load(feature_path)
+            import joblib  # Deferred: only needed once, when the model is loaded
+            
+            # Uncompressed dumps have their numpy arrays mapped from the file rather than
+            # copied, so forked workers share one copy through the page cache
+            self.model = joblib.load(model_path, mmap_mode='r')
+            self.feature_names = tuple(joblib.load(feature_path))
+            self._n_features = len(self.feature_names)
+            self._index_features()
+            # sklearn models fitted on a DataFrame re-check column names on every call.
+            # Rows are always built in feature_names order, so once that order is confirmed
+            # the check is dropped and plain arrays go straight to the model.
+            model_names = getattr(self.model, 'feature_names_in_', None)
+            if (model_names is not None and 'feature_names_in_' in vars(self.model)
+                    and tuple(model_names) == self.feature_names):
+                del self.model.feature_names_in_
+            self._needs_frame = hasattr(self.model, 'feature_names_in_')
+            self._frame_columns = None
+            if self._needs_frame:
+                import pandas as pd  # Deferred: only models that need named columns pay for pandas
+                
+                self._frame_columns = pd.Index(self.feature_names)
+            
+            # Thread dispatch costs more than scoring one row, so single predictions run
+            # serially; a shallow copy sharing the same fitted trees (estimators_) scores
+            # large batches in parallel. Only sklearn models read n_jobs at predict time:
+            # an XGBoost booster keeps the thread count it was trained with for every
+            # call, so XGBoost models are left as they are and get neither split
+            self._batch_model = self.model
+            self._batch_pool = None
+            is_booster = hasattr(self.model, 'get_booster')
+            if hasattr(self.model, 'n_jobs') and not is_booster:
+                self._batch_model = copy.copy(self.model)
+                self._batch_model.n_jobs = -1
+                self.model.n_jobs = 1
+            elif BATCH_THREADS > 1 and not is_booster:
+                self._batch_pool = ThreadPoolExecutor(max_workers=BATCH_THREADS)
+            
+            # Prefer an exported ONNX graph for scoring when onnxruntime is available
+            self._onnx_session = None
+            onnx_path = os.path.join(self.model_dir, f'{self.model_type}.onnx')
+            if ort is not None and self.model_type != 'isolation_forest' and os.path.exists(onnx_path):
+                self._onnx_session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+                self._onnx_input = self._onnx_session.get_inputs()[0].name
+                print(f"✅ Using ONNX runtime for {self.model_type} scoring")
             
             print(f"✅ Loaded {self.model_type} model successfully")
         except Exception as e:
@@ -66,162 +424,257 @@ class FraudPredictor:
             # Store device_id separately (not a model feature)
             device_id_str = transaction_data.pop('device_id', 'DEV12345')
             
-            # Add default values for missing features (20 base features)
-            default_features = {
-                'is_small_verification': 0,
-                'is_first_time_user': 0,
-                'beneficiary_change_velocity': 1,
-                'is_rural_user': 0,
-                'rapid_transactions_1h': 0,
-                'upi_pin_failed_attempts': 0,
-                'account_reports': 0,
-                'location': 0,  # Encoded location
-                'device_id': 1234,  # Encoded device_id (numeric for model)
-                'payee_balance_before': 10000.0,
-                'payee_balance_after': 0.0,
-            }
+            if self.prefilter and self._obviously_legitimate(transaction_data):
+                return self._assemble_result(transaction_data, device_id_str, 0, 0.0, RISK_LEVELS.index('LOW'))
             
-            # Merge with provided data (provided data takes precedence)
-            full_data = {**default_features, **transaction_data}
-            
-            # Calculate balance after if not provided
-            if 'amount' in full_data and full_data['payee_balance_after'] == 0.0:
-                full_data['payee_balance_after'] = full_data['payee_balance_before'] - full_data['amount']
-            
-            # ADD HYPER-AGGRESSIVE RISK FEATURES (must match training exactly)
-            full_data['night_risk'] = (1 if full_data.get('time_slot', 0) >= 2 else 0) * 4  # Increased
-            full_data['new_device_risk'] = full_data.get('is_new_device', 0) * 5  # Increased
-            full_data['high_amount_risk'] = (1 if full_data.get('amount', 0) > 20000 else 0) * 3  # Increased
-            full_data['suspicious_combo'] = (
-                1 if (
-                    full_data.get('time_slot', 0) >= 2 and 
-                    full_data.get('is_new_device', 0) == 1 and 
-                    full_data.get('amount', 0) > 15000
-                ) else 0
-            ) * 8  # Increased
-            full_data['low_trust_risk'] = (1 if full_data.get('beneficiary_trust_score', 1.0) < 0.3 else 0) * 3  # Increased
-            full_data['rapid_trans_risk'] = (1 if full_data.get('rapid_transactions_1h', 0) > 10 else 0) * 3  # Increased
-            full_data['pin_failure_risk'] = (1 if full_data.get('upi_pin_failed_attempts', 0) > 0 else 0) * 3  # Increased
-            full_data['velocity_risk'] = (1 if full_data.get('beneficiary_change_velocity', 0) > 5 else 0) * 2  # New
-            
-            # Convert to DataFrame
-            features_df = pd.DataFrame([full_data])
-            
-            # Ensure correct feature order
-            features_df = features_df[self.feature_names]
-            
-            # Get prediction
-            if self.model_type == 'isolation_forest':
-                # Isolation Forest returns -1 for anomaly, 1 for normal
-                prediction = self.model.predict(features_df)[0]
-                is_fraud = 1 if prediction == -1 else 0
-                
-                # Get anomaly score
-                anomaly_score = self.model.score_samples(features_df)[0]
-                fraud_probability = 1 / (1 + np.exp(anomaly_score))
-            else:
-                # Classification models
-                is_fraud = self.model.predict(features_df)[0]
-                fraud_probability = self.model.predict_proba(features_df)[0][1]
+            features = self._feature_row(transaction_data)
+            is_fraud, fraud_probability = self._score(features)
             
-            # Determine risk level with adjusted thresholds
-            if fraud_probability >= 0.55:  # Lowered from 0.8 to 0.55
-                risk_level = "HIGH"
-                decision = "BLOCK"
-                color = "red"
-            elif fraud_probability >= 0.3:  # Lowered from 0.5 to 0.3
-                risk_level = "MEDIUM"
-                decision = "WARN"
-                color = "orange"
-            else:
-                risk_level = "LOW"
-                decision = "ALLOW"
-                color = "green"
+            return self._assemble_result(
+                transaction_data, device_id_str, is_fraud[0], fraud_probability[0], _risk_bucket(fraud_probability)[0]
+            )
+        
+        except Exception as e:
+            print(f"❌ Prediction error: {e}")
+            raise
+    
+    def _obviously_legitimate(self, transaction_data):
+        """Prefilter: a small daytime amount with none of the engineered risk features firing"""
+        if transaction_data.get('amount', PREFILTER_MAX_AMOUNT) >= PREFILTER_MAX_AMOUNT:
+            return False
+        inputs = {
+            field: transaction_data.get(field, self._DEFAULT_FEATURES.get(field, default))
+            for field, default in RISK_INPUTS
+        }
+        return inputs['time_slot'] in (0, 1) and not any(_risk_features(inputs).values())
+    
+    def _merge_defaults(self, transaction_data):
+        """Merge defaults for missing features (provided data takes precedence)"""
+        full_data = {**self._DEFAULT_FEATURES, **transaction_data}
+        
+        # Calculate balance after if not provided
+        if 'amount' in full_data and full_data['payee_balance_after'] == 0.0:
+            full_data['payee_balance_after'] = full_data['payee_balance_before'] - full_data['amount']
+        
+        return full_data
+    
+    def _index_features(self):
+        """Feature positions and a defaults row, so single rows are written straight into an array"""
+        self._feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self._defaults_row = np.zeros(self._n_features, dtype=FEATURE_DTYPE)
+        for name, value in self._DEFAULT_FEATURES.items():
+            if name in self._feature_index:
+                self._defaults_row[self._feature_index[name]] = value
+        self._required_features = (
+            frozenset(self.feature_names) - self._DEFAULT_FEATURES.keys() - frozenset(RISK_FEATURE_NAMES)
+        )
+        self._risk_positions = tuple(
+            (name, self._feature_index[name]) for name in RISK_FEATURE_NAMES if name in self._feature_index
+        )
+        self._balance_after_pos = self._feature_index.get('payee_balance_after')
+        # Per-thread, so concurrent predict_batch calls never share a buffer
+        self._batch_buffers = threading.local()
+    
+    def _feature_row(self, transaction_data):
+        """Single transaction as a (1, F) array: defaults, provided values, then the risk features"""
+        missing = self._required_features.difference(transaction_data)
+        if missing:
+            raise KeyError(next(name for name in self.feature_names if name in missing))
+        
+        row = self._defaults_row.copy()
+        index = self._feature_index
+        for name, value in transaction_data.items():
+            i = index.get(name)
+            if i is not None:
+                row[i] = value
+        
+        # Calculate balance after if not provided
+        if (self._balance_after_pos is not None and 'amount' in transaction_data
+                and transaction_data.get('payee_balance_after', 0.0) == 0.0):
+            row[self._balance_after_pos] = (
+                transaction_data.get('payee_balance_before', self._DEFAULT_FEATURES['payee_balance_before'])
+                - transaction_data['amount']
+            )
+        
+        risk = _risk_features({
+            field: transaction_data.get(field, self._DEFAULT_FEATURES.get(field, default))
+            for field, default in RISK_INPUTS
+        })
+        for name, i in self._risk_positions:
+            row[i] = risk[name]
+        return row.reshape(1, -1)
+    
+    def _feature_matrix(self, transactions):
+        """
+        (N, F) array for a batch, with the risk features computed column-wise
+        
+        The array is a view of the thread's reusable buffer, valid until its next batch.
+        """
+        rows = [self._merge_defaults(txn) for txn in transactions]
+        risk = _risk_features({field: _batch_column(rows, field, default) for field, default in RISK_INPUTS})
+        
+        X = self._batch_buffer(len(rows))
+        for j, name in enumerate(self.feature_names):
+            X[:, j] = risk[name] if name in risk else [row[name] for row in rows]
+        return X
+    
+    def _batch_buffer(self, n):
+        """(n, F) C-contiguous view of this thread's reusable batch buffer, grown as needed"""
+        buffer = getattr(self._batch_buffers, 'buffer', None)
+        if buffer is None or len(buffer) < n:
+            buffer = np.empty((max(n, BATCH_BUFFER_ROWS), self._n_features), dtype=FEATURE_DTYPE)
+            self._batch_buffers.buffer = buffer
+        return buffer[:n]
+    
+    def _model_input(self, X):
+        """Pass the array straight through unless the model was fitted with feature names"""
+        if self._needs_frame:
+            import pandas as pd
             
-            # Get explanation
+            # Wrap the array as-is: no copy, and the column index is built once at load
+            return pd.DataFrame(X, columns=self._frame_columns, copy=False)
+        return X
+    
+    def _score(self, X):
+        """
+        Score a feature matrix in one model call
+        
+        Returns:
+            (is_fraud, fraud_probability) arrays, one entry per row
+        """
+        if self._onnx_session is not None:
+            # Exported without ZipMap: outputs are (labels, (N, 2) probabilities)
+            labels, proba = self._onnx_session.run(None, {self._onnx_input: X})
+            return labels.astype(int), _onnx_fraud_probability(proba)
+        
+        if len(X) < PARALLEL_BATCH_ROWS:
+            return self._score_rows(self.model, X)
+        if self._batch_pool is None:
+            return self._score_rows(self._batch_model, X)
+        
+        # Tree traversal releases the GIL, so row chunks score in parallel on threads
+        parts = list(self._batch_pool.map(
+            lambda chunk: self._score_rows(self.model, chunk), np.array_split(X, BATCH_THREADS)
+        ))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+    
+    def _score_rows(self, model, X):
+        """Score a feature matrix with the given (sklearn-style) model"""
+        features = self._model_input(X)
+        if self.model_type == 'isolation_forest':
+            # One pass over the trees: Isolation Forest's predict() flags an anomaly (-1)
+            # exactly when score_samples falls below offset_
+            anomaly_scores = model.score_samples(features)
+            is_fraud = (anomaly_scores < model.offset_).astype(int)
+            fraud_probability = expit(-anomaly_scores)  # = 1 / (1 + exp(score))
+        else:
+            # Classification models: the predicted class is the argmax of the probabilities
+            proba = model.predict_proba(features)
+            is_fraud = model.classes_.take(np.argmax(proba, axis=1))
+            fraud_probability = proba[:, 1]
+        
+        return is_fraud, fraud_probability
+    
+    def _assemble_result(self, transaction_data, device_id_str, is_fraud, fraud_probability, risk_bucket,
+                         explanation=None, pattern_hits=None, fraud_type=None, vulnerability_score=None):
+        """
+        Build the result dict for one scored transaction, then record it in history and the log
+        
+        Batch callers pass the explanation, fraud type, vulnerability score and the
+        (rapid_switching, vulnerable_night) detection flags precomputed; detectors are
+        then only run for their details.
+        """
+        risk_level = RISK_LEVELS[risk_bucket]
+        decision = RISK_DECISIONS[risk_bucket]
+        color = RISK_COLORS[risk_bucket]
+        
+        # Get explanation (batch callers pass theirs in precomputed)
+        if explanation is None:
             explanation = self._explain_prediction(transaction_data, fraud_probability)
-            
-            # Classify fraud type
+        
+        # Classify fraud type
+        if fraud_type is None:
             fraud_type = self.classify_fraud_type(transaction_data, fraud_probability)
-            
-            # Calculate vulnerability score
+        
+        # Calculate vulnerability score
+        if vulnerability_score is None:
             vulnerability_score = self.calculate_vulnerability_score(transaction_data)
-            
-            # Detect specific patterns (pass device_id_str separately)
+        
+        # Detect specific patterns (pass device_id_str separately)
+        rapid_switching_hit, vulnerable_night_hit = pattern_hits or (True, True)
+        rapid_switching_detected = vulnerable_night_detected = False
+        if rapid_switching_hit:
             rapid_switching_detected, rapid_switching_score, rapid_switching_details = self.detect_rapid_switching(transaction_data)
+        if vulnerable_night_hit:
             vulnerable_night_detected, vulnerable_night_score, vulnerable_night_details = self.detect_vulnerable_user_night(transaction_data)
-            
-            # Pass device_id separately for verification attack
-            transaction_with_device = {**transaction_data, 'device_id': device_id_str}
-            verification_attack_detected, verification_attack_score, verification_attack_details = self.detect_verification_attack(transaction_with_device)
-            
-            # Collect pattern alerts
-            pattern_alerts = []
-            if verification_attack_detected:
-                pattern_alerts.append({
-                    'pattern': 'verification_attack',
-                    'severity': 'CRITICAL' if verification_attack_score >= 90 else 'HIGH',
-                    'score': verification_attack_score,
-                    'details': verification_attack_details
-                })
-            if rapid_switching_detected:
-                pattern_alerts.append({
-                    'pattern': 'rapid_switching',
-                    'severity': 'HIGH' if rapid_switching_score >= 70 else 'MEDIUM',
-                    'score': rapid_switching_score,
-                    'details': rapid_switching_details
-                })
-            if vulnerable_night_detected:
-                pattern_alerts.append({
-                    'pattern': 'vulnerable_user_night',
-                    'severity': 'CRITICAL' if vulnerable_night_score >= 80 else 'HIGH',
-                    'score': vulnerable_night_score,
-                    'details': vulnerable_night_details
-                })
-            
-            # Get balance changes
-            balance_change = {
-                'payee_before': transaction_data.get('payee_balance_before', 0),
-                'payee_after': transaction_data.get('payee_balance_after', 0),
-                'beneficiary_before': transaction_data.get('beneficiary_balance_before', 0),
-                'beneficiary_after': transaction_data.get('beneficiary_balance_after', 0),
-                'payee_impact': transaction_data.get('payee_balance_before', 0) - transaction_data.get('payee_balance_after', 0),
-                'beneficiary_gain': transaction_data.get('beneficiary_balance_after', 0) - transaction_data.get('beneficiary_balance_before', 0)
-            }
-            
-            result = {
-                'is_fraud': int(is_fraud),
-                'fraud_probability': float(fraud_probability),
-                'risk_level': risk_level,
-                'decision': decision,
-                'color': color,
-                'explanation': explanation,
-                'fraud_type': fraud_type,
-                'vulnerability_score': vulnerability_score,
-                'pattern_alerts': pattern_alerts,
-                'balance_changes': balance_change,
-                'location': transaction_data.get('location', 'Unknown'),
-                'device_id': device_id_str
-            }
-            
-            # Add to history for future pattern detection
-            self.add_to_history(transaction_with_device)
-            
-            # Log prediction
-            self._log_prediction(transaction_data, result)
-            
-            return result
         
-        except Exception as e:
-            print(f"❌ Prediction error: {e}")
-            raise
+        # Pass device_id separately for verification attack
+        transaction_with_device = {**transaction_data, 'device_id': device_id_str}
+        verification_attack_detected, verification_attack_score, verification_attack_details = self.detect_verification_attack(transaction_with_device)
+        
+        # Collect pattern alerts
+        pattern_alerts = []
+        if verification_attack_detected:
+            pattern_alerts.append({
+                'pattern': 'verification_attack',
+                'severity': 'CRITICAL' if verification_attack_score >= 90 else 'HIGH',
+                'score': verification_attack_score,
+                'details': verification_attack_details
+            })
+        if rapid_switching_detected:
+            pattern_alerts.append({
+                'pattern': 'rapid_switching',
+                'severity': 'HIGH' if rapid_switching_score >= 70 else 'MEDIUM',
+                'score': rapid_switching_score,
+                'details': rapid_switching_details
+            })
+        if vulnerable_night_detected:
+            pattern_alerts.append({
+                'pattern': 'vulnerable_user_night',
+                'severity': 'CRITICAL' if vulnerable_night_score >= 80 else 'HIGH',
+                'score': vulnerable_night_score,
+                'details': vulnerable_night_details
+            })
+        
+        # Get balance changes
+        balance_change = {
+            'payee_before': transaction_data.get('payee_balance_before', 0),
+            'payee_after': transaction_data.get('payee_balance_after', 0),
+            'beneficiary_before': transaction_data.get('beneficiary_balance_before', 0),
+            'beneficiary_after': transaction_data.get('beneficiary_balance_after', 0),
+            'payee_impact': transaction_data.get('payee_balance_before', 0) - transaction_data.get('payee_balance_after', 0),
+            'beneficiary_gain': transaction_data.get('beneficiary_balance_after', 0) - transaction_data.get('beneficiary_balance_before', 0)
+        }
+        
+        result = {
+            'is_fraud': int(is_fraud),
+            'fraud_probability': float(fraud_probability),
+            'risk_level': risk_level,
+            'decision': decision,
+            'color': color,
+            'explanation': explanation,
+            'fraud_type': fraud_type,
+            'vulnerability_score': vulnerability_score,
+            'pattern_alerts': pattern_alerts,
+            'balance_changes': balance_change,
+            'location': transaction_data.get('location', 'Unknown'),
+            'device_id': device_id_str
+        }
+        
+        # Add to history for future pattern detection
+        self.add_to_history(transaction_with_device)
+        
+        # Log prediction
+        self._log_prediction(transaction_data, result)
+        
+        return result
     
     def _log_prediction(self, input_data, result):
         """Log prediction details to file"""
         try:
             log_entry = {
                 'timestamp': datetime.now().isoformat(),
-                'input': {k: v for k, v in input_data.items() if k in ['amount', 'time_slot', 'is_new_device', 'is_new_beneficiary', 'transaction_frequency', 'past_fraud_flag']},
+                'input': {k: v for k, v in input_data.items() if k in LOGGED_INPUT_FIELDS},
                 'prediction': {
                     'fraud_probability': result['fraud_probability'],
                     'risk_level': result['risk_level'],
@@ -230,62 +683,25 @@ class FraudPredictor:
                 }
             }
             
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            _enqueue_log(self.log_file, log_entry)
         except Exception as e:
             print(f"⚠️ Logging failed: {e}")
     
+    def close(self):
+        """Write out this predictor's pending log entries and stop its batch threads"""
+        flush_prediction_log(LOG_FLUSH_TIMEOUT)
+        if self._batch_pool is not None:
+            self._batch_pool.shutdown()
+            self._batch_pool = None
+    
     def classify_fraud_type(self, transaction_data, fraud_probability):
         """Classify the type of fraud based on transaction patterns"""
         if fraud_probability < 0.5:
             return 'legitimate'
         
-        score_high_amount = 0
-        score_new_device = 0
-        score_night_rush = 0
-        score_multiple_new = 0
-        
-        # High amount fraud indicators
-        if transaction_data.get('amount', 0) > 10000:
-            score_high_amount += 3
-        if transaction_data.get('amount_deviation', 0) > 0.7:
-            score_high_amount += 2
-        if transaction_data.get('upi_pin_failed_attempts', 0) > 0:
-            score_high_amount += 2
-        
-        # New device fraud indicators
-        if transaction_data.get('is_new_device', 0) == 1:
-            score_new_device += 4
-        if transaction_data.get('device_age_days', 999) < 30:
-            score_new_device += 2
-        if transaction_data.get('is_small_verification', 0) == 1:
-            score_new_device += 3
-        
-        # Night rush fraud indicators
-        if transaction_data.get('time_slot', 0) == 3:
-            score_night_rush += 3
-        if transaction_data.get('rapid_transactions_1h', 0) > 5:
-            score_night_rush += 4
-        if transaction_data.get('transaction_frequency', 0) > 10:
-            score_night_rush += 2
-        
-        # Multiple new beneficiary fraud indicators
-        if transaction_data.get('is_new_beneficiary', 0) == 1:
-            score_multiple_new += 3
-        if transaction_data.get('beneficiary_change_velocity', 0) > 5:
-            score_multiple_new += 4
-        if transaction_data.get('beneficiary_trust_score', 1) < 0.3:
-            score_multiple_new += 2
-        
-        # Return fraud type with highest score
-        scores = {
-            'high_amount': score_high_amount,
-            'new_device': score_new_device,
-            'night_rush': score_night_rush,
-            'multiple_new': score_multiple_new
-        }
-        
-        return max(scores, key=scores.get)
+        return _classify_fraud_type(tuple(
+            transaction_data.get(field, default) for field, default, *_ in FRAUD_TYPE_RULES
+        ))
     
     def detect_rapid_switching(self, transaction_data):
         """
@@ -296,37 +712,35 @@ class FraudPredictor:
         is_new_beneficiary = transaction_data.get('is_new_beneficiary', 0)
         trust_score = transaction_data.get('beneficiary_trust_score', 1.0)
         
-        risk_score = 0
+        # Score first; details are only formatted when the pattern is detected
+        velocity_points = 40 if beneficiary_velocity > 5 else 20 if beneficiary_velocity > 3 else 0
+        new_beneficiary_points = 25 if is_new_beneficiary == 1 else 0
+        trust_points = 35 if trust_score < 0.3 else 20 if trust_score < 0.5 else 0
+        risk_score = velocity_points + new_beneficiary_points + trust_points
+        
+        # Pattern detected if risk_score >= 50
+        if risk_score < 50:
+            return False, risk_score, "No rapid switching pattern detected"
+        
         details = []
         
         # Check velocity threshold
-        if beneficiary_velocity > 5:
-            risk_score += 40
+        if velocity_points == 40:
             details.append(f"High velocity: {beneficiary_velocity} beneficiary changes")
-        elif beneficiary_velocity > 3:
-            risk_score += 20
+        elif velocity_points:
             details.append(f"Moderate velocity: {beneficiary_velocity} beneficiary changes")
         
         # Check if current is new beneficiary
-        if is_new_beneficiary == 1:
-            risk_score += 25
+        if new_beneficiary_points:
             details.append("Current transaction to new beneficiary")
         
         # Check trust score
-        if trust_score < 0.3:
-            risk_score += 35
+        if trust_points == 35:
             details.append(f"Very low trust score: {trust_score:.2f}")
-        elif trust_score < 0.5:
-            risk_score += 20
+        elif trust_points:
             details.append(f"Low trust score: {trust_score:.2f}")
         
-        # Pattern detected if risk_score >= 50
-        is_detected = risk_score >= 50
-        
-        if is_detected:
-            return True, risk_score, " | ".join(details)
-        else:
-            return False, risk_score, "No rapid switching pattern detected"
+        return True, risk_score, " | ".join(details)
     
     def detect_vulnerable_user_night(self, transaction_data):
         """
@@ -339,54 +753,56 @@ class FraudPredictor:
         time_slot = transaction_data.get('time_slot', 0)
         amount = transaction_data.get('amount', 0)
         
-        risk_score = 0
+        # Score first; details are only formatted when the pattern is detected
+        rural_points = 25 if is_rural == 1 else 0
+        if is_first_time == 1 or account_age < 30:
+            age_points = 30
+        elif account_age < 90:
+            age_points = 15
+        else:
+            age_points = 0
+        # Check time slot (Night = 3, Late Night = 4)
+        is_night = time_slot >= 3
+        night_points = 30 if is_night else 0
+        amount_points = 25 if amount > 20000 else 15 if amount > 10000 else 0
+        risk_score = rural_points + age_points + night_points + amount_points
+        
+        # Pattern detected if:
+        # 1. User is vulnerable (rural OR first-time)
+        # 2. Transaction is at night
+        # 3. Amount is significant
+        is_vulnerable = (is_rural == 1 or is_first_time == 1 or account_age < 90)
+        is_significant_amount = amount > 10000
+        
+        if not (is_vulnerable and is_night and is_significant_amount):
+            return False, risk_score, "No vulnerable user night pattern detected"
+        
         details = []
         vulnerability_factors = []
         
         # Check user vulnerability
-        if is_rural == 1:
-            risk_score += 25
+        if rural_points:
             vulnerability_factors.append("Rural user (low digital literacy)")
         
-        if is_first_time == 1 or account_age < 30:
-            risk_score += 30
+        if age_points == 30:
             vulnerability_factors.append(f"New user (account age: {account_age} days)")
-        elif account_age < 90:
-            risk_score += 15
+        elif age_points:
             vulnerability_factors.append(f"Recent user (account age: {account_age} days)")
         
-        # Check time slot (Night = 3, Late Night = 4)
-        if time_slot >= 3:
-            time_name = "Late Night" if time_slot == 4 else "Night"
-            risk_score += 30
-            details.append(f"Transaction at {time_name} (exploiting vulnerable hours)")
+        time_name = "Late Night" if time_slot == 4 else "Night"
+        details.append(f"Transaction at {time_name} (exploiting vulnerable hours)")
         
         # Check amount
-        if amount > 20000:
-            risk_score += 25
+        if amount_points == 25:
             details.append(f"High amount: ₹{amount:,.0f}")
-        elif amount > 10000:
-            risk_score += 15
+        else:
             details.append(f"Significant amount: ₹{amount:,.0f}")
         
         # Combine vulnerability factors
         if vulnerability_factors:
             details.insert(0, " + ".join(vulnerability_factors))
         
-        # Pattern detected if:
-        # 1. User is vulnerable (rural OR first-time)
-        # 2. Transaction is at night
-        # 3. Amount is significant
-        is_vulnerable = (is_rural == 1 or is_first_time == 1 or account_age < 90)
-        is_night = time_slot >= 3
-        is_significant_amount = amount > 10000
-        
-        is_detected = is_vulnerable and is_night and is_significant_amount
-        
-        if is_detected:
-            return True, risk_score, " | ".join(details)
-        else:
-            return False, risk_score, "No vulnerable user night pattern detected"
+        return True, risk_score, " | ".join(details)
     
     def detect_verification_attack(self, transaction_data):
         """
@@ -408,16 +824,11 @@ class FraudPredictor:
         found_verification = False
         verification_amount = 0
         
-        for hist_txn in reversed(self.transaction_history[-20:]):  # Check last 20 transactions
-            # Same device check
-            if hist_txn.get('device_id') == device_id:
-                hist_amount = hist_txn.get('amount', 0)
-                
-                # Found small transaction (₹1-10)
-                if hist_amount <= 10:
-                    found_verification = True
-                    verification_amount = hist_amount
-                    break
+        # Latest small transaction (₹1-10) from the same device in the last 20 transactions
+        small_txn = self._small_by_device.get(device_id)
+        if small_txn is not None and time.time_ns() - small_txn[2] <= VERIFICATION_WINDOW_NS:
+            found_verification = True
+            verification_amount = small_txn[0]
         
         # Pattern detected: small test + large current
         if found_verification and is_large_transaction:
@@ -444,154 +855,149 @@ class FraudPredictor:
     def add_to_history(self, transaction_data):
         """Add transaction to history for pattern detection"""
         # Keep only essential fields for history
-        hist_entry = {
-            'amount': transaction_data.get('amount', 0),
-            'device_id': transaction_data.get('device_id', 'unknown'),
-            'timestamp': datetime.now().isoformat(),
-            'is_new_device': transaction_data.get('is_new_device', 0)
-        }
-        
+        hist_entry = HistEntry(
+            amount=transaction_data.get('amount', 0),
+            device_id=transaction_data.get('device_id', 'unknown'),
+            timestamp=time.time_ns(),
+            is_new_device=transaction_data.get('is_new_device', 0)
+        )
+        
+        seq = self._history_seq
+        self._history_seq += 1
+        if hist_entry.amount <= 10:
+            self._small_by_device[hist_entry.device_id] = (hist_entry.amount, seq, hist_entry.timestamp)
+        
+        # Bounded deque drops the oldest entry once max_history_size is reached
         self.transaction_history.append(hist_entry)
         
-        # Keep history size manageable
-        if len(self.transaction_history) > self.max_history_size:
-            self.transaction_history.pop(0)
+        # The entry leaving the lookback window stops counting as a verification precursor
+        window = min(VERIFICATION_LOOKBACK, self.max_history_size)
+        if len(self.transaction_history) > window:
+            expired = self.transaction_history[-window - 1]
+            small_txn = self._small_by_device.get(expired.device_id)
+            if small_txn is not None and small_txn[1] == seq - window:
+                del self._small_by_device[expired.device_id]
     
     def calculate_vulnerability_score(self, transaction_data):
         """Calculate vulnerability score (0-100) based on risk factors"""
-        vulnerability = 0
-        max_score = 100
-        
-        # Account age vulnerability (20 points)
-        account_age = transaction_data.get('account_age_days', 365)
-        if account_age < 30:
-            vulnerability += 20
-        elif account_age < 90:
-            vulnerability += 15
-        elif account_age < 180:
-            vulnerability += 10
-        elif account_age < 365:
-            vulnerability += 5
-        
-        # Device trust (15 points)
-        device_age = transaction_data.get('device_age_days', 180)
-        if device_age < 7:
-            vulnerability += 15
-        elif device_age < 30:
-            vulnerability += 10
-        elif device_age < 90:
-            vulnerability += 5
-        
-        # Behavioral patterns (25 points)
-        if transaction_data.get('rapid_transactions_1h', 0) > 5:
-            vulnerability += 10
-        if transaction_data.get('upi_pin_failed_attempts', 0) > 0:
-            vulnerability += 15
-        
-        # Account reputation (20 points)
-        if transaction_data.get('account_reports', 0) > 0:
-            vulnerability += 15
-        if transaction_data.get('past_fraud_flag', 0) == 1:
-            vulnerability += 5
-        
-        # Beneficiary trust (10 points)
-        trust_score = transaction_data.get('beneficiary_trust_score', 0.5)
-        vulnerability += int((1 - trust_score) * 10)
-        
-        # Location risk (10 points)
-        if transaction_data.get('is_rural_user', 0) == 1:
-            vulnerability += 5
-        if transaction_data.get('location_change', 0) == 1:
-            vulnerability += 5
-        
-        return min(vulnerability, max_score)
+        return _vulnerability_score(
+            tuple(transaction_data.get(field, default) for field, default, *_ in VULNERABILITY_TIERS),
+            tuple(transaction_data.get(field, default) for field, default, *_ in VULNERABILITY_RULES),
+            transaction_data.get('beneficiary_trust_score', VULNERABILITY_TRUST_DEFAULT),
+        )
     
     def _explain_prediction(self, transaction_data, fraud_probability):
         """Generate human-readable explanation with enhanced features"""
-        reasons = []
-        
-        # Check amount
-        if transaction_data['amount'] > 20000:
-            reasons.append(f"High transaction amount (₹{transaction_data['amount']:.2f})")
-        
-        # Check time
-        time_mapping = {0: 'Morning', 1: 'Afternoon', 2: 'Evening', 3: 'Night', 4: 'Late Night'}
-        time_name = time_mapping.get(transaction_data['time_slot'], 'Unknown')
-        if transaction_data['time_slot'] >= 3:
-            reasons.append(f"Transaction at night ({time_name})")
-        
-        # Check device
-        if transaction_data['is_new_device'] == 1:
-            reasons.append("New device detected")
-        
-        # Check beneficiary
-        if transaction_data['is_new_beneficiary'] == 1:
-            reasons.append("New beneficiary")
-        
-        # Check location
-        if transaction_data['location_change'] == 1:
-            reasons.append("Location change detected")
-        
-        # Check frequency
-        if transaction_data['transaction_frequency'] > 10:
-            reasons.append(f"High transaction frequency ({transaction_data['transaction_frequency']} in 24h)")
-        
-        # Check past fraud
-        if transaction_data['past_fraud_flag'] == 1:
-            reasons.append("Past fraud activity detected")
-        
-        # Check amount deviation
-        if transaction_data['amount_deviation'] > 0.7:
-            reasons.append(f"Amount deviates from user pattern ({transaction_data['amount_deviation']:.2f})")
-        
-        # Check trust score
-        if transaction_data['beneficiary_trust_score'] < 0.4:
-            reasons.append(f"Low beneficiary trust score ({transaction_data['beneficiary_trust_score']:.2f})")
-        
-        # Check device age
-        if transaction_data.get('device_age_days', 999) < 7:
-            reasons.append(f"Very new device ({transaction_data['device_age_days']} days old)")
+        reasons = [
+            reason(transaction_data)
+            for field, default, compare, threshold, reason in EXPLANATION_RULES
+            if compare(_rule_value(transaction_data, field, default), threshold)
+        ]
         
-        # Check small verification
-        if transaction_data.get('is_small_verification', 0) == 1:
-            reasons.append("Small verification transaction detected (possible precursor to fraud)")
-        
-        # Check PIN failures
-        if transaction_data.get('upi_pin_failed_attempts', 0) > 0:
-            reasons.append(f"{transaction_data['upi_pin_failed_attempts']} failed PIN attempts")
-        
-        # Check rapid transactions
-        if transaction_data.get('rapid_transactions_1h', 0) > 5:
-            reasons.append(f"Rapid transactions: {transaction_data['rapid_transactions_1h']} in last hour")
+        if not reasons:
+            return NORMAL_EXPLANATION
         
-        # Check account reports
-        if transaction_data.get('account_reports', 0) > 0:
-            reasons.append("Account has been reported for suspicious activity")
+        return " | ".join(reasons)
+    
+    def _explain_batch(self, transactions):
+        """Explanations for many transactions, evaluating each rule once over the whole batch"""
+        fired = np.column_stack([
+            compare(_batch_column(transactions, field, default), threshold)
+            for field, default, compare, threshold, _ in EXPLANATION_RULES
+        ])
+        
+        explanations = []
+        for txn, row in zip(transactions, fired):
+            reasons = [EXPLANATION_RULES[j][4](txn) for j in np.flatnonzero(row)]
+            explanations.append(" | ".join(reasons) if reasons else NORMAL_EXPLANATION)
+        return explanations
+    
+    def _classify_batch(self, transactions, fraud_probability):
+        """Fraud types for many transactions: rule hits times the points matrix, then argmax"""
+        fired = np.column_stack([
+            compare(_batch_column(transactions, field, default), threshold)
+            for field, default, compare, threshold, _, _ in FRAUD_TYPE_RULES
+        ])
+        fraud_types = np.array(FRAUD_TYPES)[(fired @ FRAUD_TYPE_POINTS).argmax(axis=1)]
+        return np.where(fraud_probability < 0.5, 'legitimate', fraud_types).tolist()
+    
+    def _vulnerability_batch(self, transactions):
+        """Vulnerability scores for many transactions, evaluating each factor once over the batch"""
+        trust = _batch_column(transactions, 'beneficiary_trust_score', VULNERABILITY_TRUST_DEFAULT)
+        vulnerability = ((1 - trust) * 10).astype(int)
+        for field, default, bounds, tier_points in VULNERABILITY_TIERS:
+            column = _batch_column(transactions, field, default)
+            vulnerability += np.select([column < bound for bound in bounds], tier_points, default=0)
+        for field, default, compare, threshold, points in VULNERABILITY_RULES:
+            vulnerability += compare(_batch_column(transactions, field, default), threshold) * points
+        return np.minimum(vulnerability, MAX_VULNERABILITY).tolist()
+    
+    def _pattern_masks(self, transactions):
+        """
+        Which transactions trigger the history-free detectors, as boolean masks
         
-        # Check beneficiary velocity
-        if transaction_data.get('beneficiary_change_velocity', 0) > 10:
-            reasons.append(f"High beneficiary changes ({transaction_data['beneficiary_change_velocity']})")
+        Mirrors the detection conditions of detect_rapid_switching and
+        detect_vulnerable_user_night over the whole batch at once.
+        """
+        # Rapid switching: velocity + new beneficiary + trust points reach 50
+        velocity = _batch_column(transactions, 'beneficiary_change_velocity', 0)
+        trust = _batch_column(transactions, 'beneficiary_trust_score', 1.0)
+        switching_score = (
+            np.select([velocity > 5, velocity > 3], [40, 20], default=0)
+            + np.where(_batch_column(transactions, 'is_new_beneficiary', 0) == 1, 25, 0)
+            + np.select([trust < 0.3, trust < 0.5], [35, 20], default=0)
+        )
+        rapid_switching = switching_score >= 50
+        
+        # Vulnerable user (rural, first-time or recent account) + night + significant amount
+        vulnerable_night = (
+            ((_batch_column(transactions, 'is_rural_user', 0) == 1)
+             | (_batch_column(transactions, 'is_first_time_user', 0) == 1)
+             | (_batch_column(transactions, 'account_age_days', 999) < 90))
+            & (_batch_column(transactions, 'time_slot', 0) >= 3)
+            & (_batch_column(transactions, 'amount', 0) > 10000)
+        )
+        
+        return rapid_switching, vulnerable_night
+    
+    def predict_batch(self, transactions):
+        """
+        Predict multiple transactions with a single model call
         
-        # Check first time user
-        if transaction_data.get('is_first_time_user', 0) == 1:
-            reasons.append("First-time user")
+        Args:
+            transactions: List of transaction dicts, or a DataFrame with one row per transaction
         
-        # Check rural location
-        if transaction_data.get('is_rural_user', 0) == 1:
-            reasons.append(f"Transaction from rural area ({transaction_data.get('location', 'Unknown')})")
+        Returns:
+            List of result dicts, identical to calling predict() on each transaction in order
+        """
+        if hasattr(transactions, 'to_dict'):  # DataFrame
+            transactions = transactions.to_dict('records')
+        if len(transactions) == 0:
+            return []
         
-        if not reasons:
-            return "Transaction appears normal based on user patterns and behavioral analysis"
+        try:
+            device_ids = [txn.pop('device_id', 'DEV12345') for txn in transactions]
+            
+            features = self._feature_matrix(transactions)
+            is_fraud, fraud_probability = self._score(features)
+            risk_buckets = _risk_bucket(fraud_probability)
+            explanations = self._explain_batch(transactions)
+            fraud_types = self._classify_batch(transactions, fraud_probability)
+            vulnerability_scores = self._vulnerability_batch(transactions)
+            pattern_hits = zip(*self._pattern_masks(transactions))
+            
+            # Pattern detection reads the history, so results are assembled in input order
+            return [
+                self._assemble_result(
+                    txn, device_id_str, is_fraud[i], fraud_probability[i], risk_buckets[i], explanations[i], hits,
+                    fraud_types[i], vulnerability_scores[i]
+                )
+                for i, (txn, device_id_str, hits) in enumerate(zip(transactions, device_ids, pattern_hits))
+            ]
         
-        return " | ".join(reasons)
-    
-    def predict_batch(self, transactions):
-        """Predict multiple transactions"""
-        results = []
-        for txn in transactions:
-            result = self.predict(txn)
-            results.append(result)
-        return results
+        except Exception as e:
+            print(f"❌ Prediction error: {e}")
+            raise
 
 
 def get_feature_template():
@@ -22,6 +22,8 @@ def load_model(model_type='random_forest'):
     """Load the fraud detection model"""
     global predictor
     try:
+        if predictor is not None:
+            predictor.close()
         predictor = FraudPredictor(model_type=model_type)
         return f"✅ {model_type.upper()} model loaded successfully!"
     except Exception as e:
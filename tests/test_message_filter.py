@@ -0,0 +1,56 @@
+"""
+Regression tests for MessageFilter keyword scoring
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.message_filter import MessageFilter
+
+
+class MessageFilterScoreTest(unittest.TestCase):
+    def setUp(self):
+        self.message_filter = MessageFilter(cache_size=0)
+
+    def analyze(self, message):
+        return self.message_filter.analyze_message(message)
+
+    def test_nested_fraud_keyword_not_double_counted(self):
+        result = self.analyze("Please verify your account")
+        self.assertEqual(result['fraud_score'], 25)
+        self.assertEqual(result['flags'], ['🚨 High-risk keywords: verify your account'])
+
+    def test_nested_keyword_counted_elsewhere_in_message(self):
+        result = self.analyze("Verify your account now, urgent: verify via link")
+        self.assertIn('⚠️ Suspicious keywords: verify, urgent', result['flags'])
+        self.assertEqual(result['fraud_score'], 60)
+
+    def test_fraud_keyword_covered_at_later_offset_not_double_counted(self):
+        result = self.analyze("Income tax refund pending, call 9876543210")
+        # 'refund pending' lies inside 'tax refund pending'
+        self.assertIn('🚨 High-risk keywords: income tax refund, tax refund pending', result['flags'])
+        self.assertEqual(result['fraud_score'], 65)
+        self.assertEqual(result['risk_level'], 'HIGH')
+
+    def test_fraud_match_covers_inner_suspicious_keyword(self):
+        result = self.analyze("Send money urgently today")
+        self.assertEqual(result['flags'][0], '🚨 High-risk keywords: send money urgently')
+        self.assertFalse(any(flag.startswith('⚠️') for flag in result['flags']))
+        self.assertEqual(result['fraud_score'], 40)
+
+    def test_fraud_match_does_not_cover_urgency_words(self):
+        result = self.analyze("Act now today")
+        self.assertEqual(result['fraud_score'], 25)
+        self.assertIn('⏰ Creates false urgency', result['flags'])
+
+    def test_overlapping_impersonation_and_suspicious_keywords(self):
+        result = self.analyze("Payment from bank account 1234 successful")
+        self.assertEqual(result['fraud_score'], 30)
+        self.assertIn('⚠️ Suspicious keywords: bank account', result['flags'])
+        self.assertIn('🎭 Impersonation attempt: from bank', result['flags'])
+
+
+if __name__ == '__main__':
+    unittest.main()
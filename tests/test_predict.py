@@ -0,0 +1,205 @@
+"""
+Regression tests for FraudPredictor scoring
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.predict import (
+    LOG_FLUSH_TIMEOUT, PARALLEL_BATCH_ROWS, VERIFICATION_LOOKBACK, FraudPredictor, RISK_FEATURE_NAMES, RISK_INPUTS,
+    _onnx_fraud_probability, _risk_bucket, _risk_features, flush_prediction_log, get_feature_template,
+)
+
+try:
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+except ImportError:
+    RandomForestClassifier = None
+
+try:
+    import onnxruntime
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    onnxruntime = None
+
+# Model inputs: the raw transaction fields followed by the engineered risk features
+BASE_FEATURES = (
+    'amount', 'time_slot', 'is_new_device', 'is_new_beneficiary', 'location_change', 'transaction_frequency',
+    'past_fraud_flag', 'amount_deviation', 'beneficiary_trust_score', 'device_age_days', 'account_age_days',
+    'is_first_time_user', 'is_rural_user', 'beneficiary_change_velocity', 'rapid_transactions_1h',
+    'upi_pin_failed_attempts',
+)
+FEATURE_NAMES = list(BASE_FEATURES + RISK_FEATURE_NAMES)
+# Inputs with a FraudPredictor default, left out of some test transactions
+OPTIONAL_FIELDS = (
+    'is_first_time_user', 'is_rural_user', 'beneficiary_change_velocity', 'rapid_transactions_1h',
+    'upi_pin_failed_attempts',
+)
+MINUTE_NS = 60 * 1_000_000_000
+
+
+def random_transaction(rng):
+    """One transaction dict with every model input, spread across the rule thresholds"""
+    return {
+        'amount': float(rng.choice([5.0, rng.uniform(10, 5000), rng.uniform(5000, 80000)])),
+        'time_slot': int(rng.integers(0, 5)),
+        'is_new_device': int(rng.integers(0, 2)),
+        'is_new_beneficiary': int(rng.integers(0, 2)),
+        'location_change': int(rng.integers(0, 2)),
+        'transaction_frequency': int(rng.integers(0, 20)),
+        'past_fraud_flag': int(rng.random() < 0.1),
+        'amount_deviation': float(rng.uniform(0, 1.5)),
+        'beneficiary_trust_score': float(rng.uniform(0, 1)),
+        'device_age_days': int(rng.integers(0, 400)),
+        'account_age_days': int(rng.integers(0, 800)),
+        'is_first_time_user': int(rng.random() < 0.2),
+        'is_rural_user': int(rng.random() < 0.3),
+        'beneficiary_change_velocity': int(rng.integers(0, 12)),
+        'rapid_transactions_1h': int(rng.integers(0, 15)),
+        'upi_pin_failed_attempts': int(rng.integers(0, 3)),
+        'payee_balance_before': float(rng.uniform(0, 100000)),
+        'location': 'Mumbai',
+        'device_id': f"DEV{rng.integers(0, 5)}",
+    }
+
+
+def feature_vector(txn):
+    """Model input row for a transaction, in FEATURE_NAMES order"""
+    risk = _risk_features({field: txn.get(field, default) for field, default in RISK_INPUTS})
+    return [txn[name] for name in BASE_FEATURES] + [risk[name] for name in RISK_FEATURE_NAMES]
+
+
+def build_model_dir(model_dir, n_estimators=20, seed=0):
+    """Train a small random forest on noisy rule-based labels and save it as FraudPredictor expects"""
+    rng = np.random.default_rng(seed)
+    X = np.array([feature_vector(random_transaction(rng)) for _ in range(2000)], dtype=np.float32)
+    risk_total = X[:, len(BASE_FEATURES):].sum(axis=1)
+    y = (risk_total + rng.normal(0, 4, len(X)) > 8).astype(int)
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+    joblib.dump(model, os.path.join(model_dir, 'random_forest.joblib'))
+    joblib.dump(FEATURE_NAMES, os.path.join(model_dir, 'feature_names.joblib'))
+    return model
+
+
+@unittest.skipIf(RandomForestClassifier is None, "scikit-learn is not installed")
+class PredictorTestCase(unittest.TestCase):
+    """Runs each test in a scratch directory holding a freshly trained model and the logs"""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        self.addCleanup(flush_prediction_log, LOG_FLUSH_TIMEOUT)
+        os.chdir(scratch.name)
+        self.model_dir = scratch.name
+        self.model = build_model_dir(self.model_dir)
+
+    def make_predictor(self):
+        predictor = FraudPredictor(model_dir=self.model_dir)
+        self.addCleanup(predictor.close)
+        return predictor
+
+
+class BatchParityTest(PredictorTestCase):
+    def test_predict_batch_matches_predict(self):
+        rng = np.random.default_rng(2)
+        transactions = [random_transaction(rng) for _ in range(PARALLEL_BATCH_ROWS + 200)]
+        for txn in transactions[::2]:
+            for field in OPTIONAL_FIELDS:
+                del txn[field]
+
+        # Separate predictors, so both see the same history for pattern detection
+        single_predictor = self.make_predictor()
+        expected = [single_predictor.predict(dict(txn)) for txn in transactions]
+        results = self.make_predictor().predict_batch([dict(txn) for txn in transactions])
+
+        self.assertEqual(len(results), len(expected))
+        for result, single in zip(results, expected):
+            result, single = dict(result), dict(single)
+            # The batch may sum the trees in a different order on several cores
+            self.assertAlmostEqual(result.pop('fraud_probability'), single.pop('fraud_probability'), places=9)
+            self.assertEqual(result, single)
+
+
+class VerificationAttackTest(PredictorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = 0
+        clock = mock.patch('time.time_ns', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.predictor = self.make_predictor()
+
+    def transact(self, amount, device_id='DEV1', minutes=0):
+        self.now += minutes * MINUTE_NS
+        result = self.predictor.predict({**get_feature_template(), 'amount': amount, 'device_id': device_id})
+        return {alert['pattern']: alert['score'] for alert in result['pattern_alerts']}
+
+    def test_large_transaction_within_window_after_small_test(self):
+        self.transact(5)
+        self.assertEqual(self.transact(25000, minutes=9).get('verification_attack'), 95)
+
+    def test_small_test_expires_after_ten_minutes(self):
+        self.transact(5)
+        self.assertNotIn('verification_attack', self.transact(25000, minutes=11))
+
+    def test_small_test_only_counts_for_its_device(self):
+        self.transact(5, device_id='DEV1')
+        self.assertNotIn('verification_attack', self.transact(25000, device_id='DEV2', minutes=1))
+
+    def test_latest_small_test_restarts_the_window(self):
+        self.transact(5)
+        self.transact(3, minutes=8)
+        self.assertIn('verification_attack', self.transact(25000, minutes=8))
+
+    def test_small_test_leaves_lookback_after_later_transactions(self):
+        self.transact(5)
+        for _ in range(VERIFICATION_LOOKBACK - 1):
+            self.transact(500, device_id='DEV2')
+        self.assertIn('verification_attack', self.transact(25000))
+
+        self.transact(5)
+        for _ in range(VERIFICATION_LOOKBACK):
+            self.transact(500, device_id='DEV2')
+        self.assertNotIn('verification_attack', self.transact(25000))
+
+
+class OnnxProbabilityTest(unittest.TestCase):
+    def test_float32_boundary_values_keep_their_bucket(self):
+        proba = np.array([[0.45, 0.5499996], [0.7, 0.2999998], [0.8, 0.2]], dtype=np.float32)
+        self.assertEqual(_risk_bucket(_onnx_fraud_probability(proba)).tolist(), [0, 1, 2])
+
+
+@unittest.skipIf(onnxruntime is None, "onnxruntime and skl2onnx are not installed")
+class OnnxParityTest(PredictorTestCase):
+    def test_boundary_rows_match_joblib_risk_level(self):
+        onnx_model = convert_sklearn(
+            self.model,
+            initial_types=[('x', FloatTensorType([None, len(FEATURE_NAMES)]))],
+            options={id(self.model): {'zipmap': False}}
+        )
+        with open(os.path.join(self.model_dir, 'random_forest.onnx'), 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        predictor = self.make_predictor()
+        self.assertIsNotNone(predictor._onnx_session)
+
+        rng = np.random.default_rng(1)
+        X = predictor._feature_matrix([random_transaction(rng) for _ in range(3000)]).copy()
+        expected = self.model.predict_proba(X)[:, 1]
+        # 20 trees: probabilities are multiples of 0.05, so rows sit exactly on 0.55 and 0.3
+        self.assertTrue(np.isclose(expected, 0.55).any() and np.isclose(expected, 0.3).any())
+
+        _, fraud_probability = predictor._score(X)
+        np.testing.assert_array_equal(_risk_bucket(fraud_probability), _risk_bucket(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
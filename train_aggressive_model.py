@@ -7,6 +7,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
+import os
 
 # Load dataset
 df = pd.read_csv("data/raw/upi_transactions.csv")
@@ -179,10 +180,35 @@ for test in test_cases:
     print(f"  Fraud Probability: {pred_proba*100:.1f}%")
     print(f"  Prediction: {'🔴 FRAUD' if pred == 1 else '🟢 LEGITIMATE'}")
 
-# Save model
+# Save model (serial prediction: single-row scoring is slower through joblib dispatch)
+model.n_jobs = 1
 joblib.dump(model, 'models/random_forest.joblib')
 joblib.dump(all_features, 'models/feature_names.joblib')
 
+# Optional ONNX export, picked up by FraudPredictor when onnxruntime is installed
+onnx_path = 'models/random_forest.onnx'
+# Don't leave a stale graph from an earlier training run next to the new model
+if os.path.exists(onnx_path):
+    os.remove(onnx_path)
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('x', FloatTensorType([None, len(all_features)]))],
+        options={id(model): {'zipmap': False}}
+    )
+    with open(onnx_path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    print(f"✅ ONNX model saved to {onnx_path}")
+except ImportError:
+    print("ℹ️ skl2onnx not installed, skipping ONNX export")
+except Exception as e:
+    if os.path.exists(onnx_path):
+        os.remove(onnx_path)
+    print(f"⚠️ ONNX export failed, skipping: {e}")
+
 print(f"\n{'='*60}")
 print(f"✅ AGGRESSIVE MODEL SAVED")
 print(f"{'='*60}")